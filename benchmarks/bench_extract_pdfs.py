@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: result-page link extraction, old two-pass html.parser path
+vs. eval_crawler.extract_pdfs (one strained pass on lxml when available).
+
+    python benchmarks/bench_extract_pdfs.py [saved_page.html …]
+
+Pass results pages saved from the browser ("Save page as… HTML only").
+Without arguments a synthetic page of 200 report cards is used.
+"""
+from __future__ import annotations
+import re, sys, timeit
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import eval_crawler as ec
+
+CARD = """
+<div class="col-md-6"><div class="panel panel-default sr-card">
+  <div class="panel-body">
+    <p class="sr-dataitem-info-code">EN.601.{n:03d}.01.FA23</p>
+    <h2>Some Course Title {n}</h2>
+    <p class="sr-dataitem-info-instr">Doe, Jane</p>
+    <p>2023 Fall ASEN {r} of 40 responded ({p}%)</p>
+    <a class="sr-pdf" href="#" data-id0="{n}" data-id1="7" data-id2="{r}" data-id3="1">
+      Download PDF</a>
+  </div></div></div>"""
+
+def synthetic_page(n_cards: int = 200) -> str:
+    nav   = "".join(f'<li><a href="/x/{i}">nav {i}</a></li>' for i in range(300))
+    cards = "".join(CARD.format(n=i, r=i % 40, p=i % 100) for i in range(n_cards))
+    return (f"<html><head><title>Results</title></head><body><ul>{nav}</ul>"
+            f'<div class="row">{cards}</div>'
+            f'<a id="publicMore" href="#">Show more</a></body></html>')
+
+def legacy(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    more = bool(soup.select_one("#publicMore"))
+    soup = BeautifulSoup(html, "html.parser")
+    out  = []
+    for a in soup.select("a.sr-pdf"):
+        url   = (f"{ec.BASE}/Reports/SRPdf.aspx?"
+                 f"{a['data-id0']},{a['data-id1']},{a['data-id2']},{a['data-id3']}")
+        card  = a.find_parent(class_=re.compile(r"(panel|card)")) or a.parent
+        title = card.get_text(" ", strip=True)
+        out.append((url, re.sub(r"[^\w\- ]", "_", title) + ".pdf"))
+    return out, more
+
+def current(html: str):
+    return ec.extract_pdfs(html), bool(ec._MORE_RE.search(html))
+
+def main(paths: list[str]) -> None:
+    pages = ([Path(p).read_text(encoding="utf-8", errors="replace") for p in paths]
+             or [synthetic_page()])
+    kb = sum(map(len, pages)) / 1024
+    print(f"{len(pages)} page(s), {kb:,.0f} KiB, parser={ec.PARSER}")
+
+    for html in pages:
+        assert legacy(html) == current(html), "outputs differ"
+
+    for name, fn in (("legacy", legacy), ("current", current)):
+        n = 20
+        t = min(timeit.repeat(lambda: [fn(h) for h in pages], number=n, repeat=3)) / n
+        print(f"  {name:<8} {t * 1e3:8.2f} ms/run  {kb / t / 1024:6.2f} MiB/s")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+Benchmark: histogram decoding in preprocess.py – the old per-cell
+ast.literal_eval + Series path vs. hist_matrix/hist_stats, on the shipped
+all_course_stats.csv replicated 100×.
+
+    python benchmarks/bench_hist_parse.py [csv] [replicas]
+"""
+from __future__ import annotations
+import ast, sys, time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "course_dashboard"))
+from preprocess import hist_matrix, hist_stats
+
+def parse_hist_stats(cell):
+    if pd.isna(cell):
+        return 0, np.nan, np.nan
+    pairs = ast.literal_eval(cell)
+    counts = {v: c for v, c in pairs if v != 0}
+    n = sum(counts.values())
+    if n == 0:
+        return 0, np.nan, np.nan
+    mean = sum(v*c for v,c in counts.items()) / n
+    m2 = sum((v**2)*c for v,c in counts.items()) / n
+    var = m2 - mean**2
+    sd = np.sqrt(var) if var > 0 else 0.0
+    return n, mean, sd
+
+def legacy(df, hist_cols):
+    out = {}
+    for q in hist_cols:
+        out[q] = df[q].apply(lambda cell: pd.Series(parse_hist_stats(cell))).to_numpy()
+    return out
+
+def vectorized(df, hist_cols):
+    return {q: np.column_stack(hist_stats(hist_matrix(df[q]))) for q in hist_cols}
+
+def main(csv: str, replicas: int) -> None:
+    base = pd.read_csv(csv)
+    df = pd.concat([base] * replicas, ignore_index=True)
+    hist_cols = df.columns[7:]
+    print(f"{len(df):,} rows × {len(hist_cols)} histogram columns")
+
+    timings = {}
+    for fn in (legacy, vectorized):
+        t = time.perf_counter()
+        res = fn(df, hist_cols)
+        timings[fn.__name__] = time.perf_counter() - t
+        print(f"  {fn.__name__:<10} {timings[fn.__name__]:8.3f} s")
+        if fn is legacy:
+            ref = res
+    for q in hist_cols:
+        np.testing.assert_allclose(res[q].astype(float), ref[q].astype(float),
+                                   rtol=1e-12, equal_nan=True)
+    print(f"  results match, speed-up {timings['legacy'] / timings['vectorized']:.0f}×")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else str(ROOT / "all_course_stats.csv"),
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100)
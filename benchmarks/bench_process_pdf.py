@@ -0,0 +1,100 @@
+"""
+Benchmark: extract.process_pdf (page-level, early stop) vs. the old
+whole-document text path, over a corpus of report PDFs, plus what the
+watcher actually runs: extract_with_text, which also hashes the PDF and
+keeps the page text for the cache (with and without --cache-all-pages).
+
+    python benchmarks/bench_process_pdf.py [pdf_dir]
+
+Reports pages/s and the Python heap allocated per PDF (tracemalloc peak).
+Without a folder a synthetic corpus is generated: one metadata page, the
+five standard questions and three pages of free-text comments per report.
+"""
+from __future__ import annotations
+import re, sys, tempfile, time, tracemalloc
+from pathlib import Path
+import fitz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import extract
+
+QUESTIONS = sorted(extract.KNOWN_QUESTIONS)
+
+def make_corpus(folder: Path, n_reports: int = 40) -> list[Path]:
+    paths = []
+    for i in range(n_reports):
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((50, 60), (
+            f"Course: EN.601.{100 + i}.01.FA23 : Some Course {i}\n"
+            f"Jane Doe Instructor\n2023 Fall\nASEN\n"), fontsize=9)
+        for k, q in enumerate(QUESTIONS, 1):
+            page = doc.new_page()
+            table = "".join(f"({v}) {c} {c * 10:.2f}%\n"
+                            for v, c in ((1, 0), (2, 1), (3, 2), (4, 3), (5, 4), (0, 0)))
+            page.insert_text((50, 60), f"\n{k} - {q}\n{table}10/20 (50%)\n", fontsize=9)
+        for _ in range(3):
+            page = doc.new_page()
+            page.insert_text((50, 60), "Comments:\n" + "Great course, lots of work.\n" * 40,
+                             fontsize=8)
+        p = folder / f"EN_601_{100 + i} Some Course {i} 10 of 20  responded.pdf"
+        doc.save(p)
+        paths.append(p)
+    return paths
+
+def legacy(file_path):
+    doc = fitz.open(file_path)
+    all_text = "".join(page.get_text() for page in doc)
+    metadata = extract.extract_metadata(all_text)
+    questions_dict = {}
+    for block in re.split(r"\n\d+\s*-\s*", all_text)[1:]:
+        q = extract.extract_question_data(block)
+        if q["responses"] and q["question_title"] not in questions_dict:
+            questions_dict[q["question_title"]] = q["responses"]
+    row = {"file": Path(file_path).name, **metadata, "num_respondents": 0}
+    row.update(questions_dict)
+    row["num_respondents"] = extract.extract_respondents_from_filename(Path(file_path).name)
+    return row
+
+def cached(file_path):
+    return extract.extract_with_text(file_path)[0]
+
+def cached_all(file_path):
+    return extract.extract_with_text(file_path, all_pages=True)[0]
+
+def run(fn, paths, n_pages, repeat=5):
+    rows = [fn(p) for p in paths]            # warm-up (file cache, imports)
+    dt = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for p in paths:
+            fn(p)
+        dt = min(dt, time.perf_counter() - t)
+
+    peaks = []
+    for p in paths:
+        tracemalloc.start()
+        fn(p)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"  {fn.__name__:<12} {n_pages / dt:8.0f} pages/s  "
+          f"{dt / len(paths) * 1e3:6.2f} ms/pdf  "
+          f"{sum(peaks) / len(peaks) / 1024:7.1f} KiB peak/pdf")
+    return rows
+
+def main(folder: str | None) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = (sorted(Path(folder).glob("*.pdf")) if folder
+                 else make_corpus(Path(tmp)))
+        n_pages = sum(fitz.open(p).page_count for p in paths)
+        print(f"{len(paths)} PDFs, {n_pages} pages")
+
+        old = run(legacy, paths, n_pages)
+        new = run(extract.process_pdf, paths, n_pages)
+        same = sum(a == b for a, b in zip(old, new))
+        print(f"  identical rows: {same}/{len(paths)}")
+        for fn in (cached, cached_all):
+            assert run(fn, paths, n_pages) == new
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
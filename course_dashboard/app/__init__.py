@@ -1,13 +1,30 @@
 from flask import Flask
-from flask_caching import Cache
+from .caching import cache
 
-cache = Cache(config={
-    'CACHE_TYPE': 'simple',
-    'CACHE_DEFAULT_TIMEOUT': 300
-})
 def create_app():
     app = Flask(__name__, static_folder='static', template_folder='templates')
+    app.config.update(
+        CACHE_TYPE=f'{__name__}.caching.LRUCache',
+        CACHE_DEFAULT_TIMEOUT=300,
+        CACHE_THRESHOLD=512,
+    )
+    # e.g. FLASK_CACHE_TYPE=FileSystemCache FLASK_CACHE_DIR=/tmp/jhu_eval_views
+    # (or RedisCache with FLASK_CACHE_REDIS_URL) to share hits between workers
+    app.config.from_prefixed_env()
     cache.init_app(app)
+
+    from . import data_loader
+    def _invalidate(version):
+        with app.app_context():
+            cache.clear()
+    data_loader.on_reload(_invalidate)
+    data_loader.start_watcher()
+
+    # start fitting the common course maps before anyone asks for them
+    from . import embedding
+    data_loader.on_reload(lambda version: embedding.embeddings())
+    embedding.embeddings()
+
     from .routes.main import main_bp
     app.register_blueprint(main_bp)
 
@@ -0,0 +1,83 @@
+import numpy as np
+
+MAX_BINS = 500
+
+
+def window_arg(qp):
+    """(xmin, xmax, ymin, ymax) from query parameters; missing sides are open"""
+    return tuple(float(qp[k]) if qp.get(k, "").strip() else None
+                 for k in ("xmin", "xmax", "ymin", "ymax"))
+
+def in_window(x, y, window) -> np.ndarray:
+    """Boolean mask of the points inside window (bounds inclusive)"""
+    xmin, xmax, ymin, ymax = window
+    keep = np.ones(len(x), dtype=bool)
+    for v, lo, hi in ((x, xmin, xmax), (y, ymin, ymax)):
+        if lo is not None:
+            keep &= v >= lo
+        if hi is not None:
+            keep &= v <= hi
+    return keep
+
+def sample(positions: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    At most max_points of positions, picked uniformly at random with a fixed
+    seed (the same request always gets the same points), in original order
+    """
+    if max_points <= 0 or len(positions) <= max_points:
+        return positions
+    rng = np.random.default_rng(0)
+    return np.sort(rng.choice(positions, size=max_points, replace=False))
+
+def _extent(v, lo, hi):
+    if lo is None:
+        lo = float(v.min()) if len(v) else 0.0
+    if hi is None:
+        hi = float(v.max()) if len(v) else lo + 1.0
+    return (lo, hi) if hi > lo else (lo - 0.5, lo + 0.5)
+
+def grid(x, y, bins=50, window=(None,) * 4, means=None, modes=None) -> dict:
+    """
+    Bin points into a bins × bins grid over window (the data range on open
+    sides). Returns the non-empty cells as parallel lists: centre x / y,
+    count, the mean of each `means` column (NaN ignored) and the most
+    common value of each non-negative integer `modes` column.
+    """
+    bins = int(min(max(bins, 1), MAX_BINS))
+    keep = in_window(x, y, window)
+    x, y = x[keep], y[keep]
+    (x0, x1), (y0, y1) = _extent(x, *window[:2]), _extent(y, *window[2:])
+
+    ix = np.clip(((x - x0) / (x1 - x0) * bins).astype(np.int64), 0, bins - 1)
+    iy = np.clip(((y - y0) / (y1 - y0) * bins).astype(np.int64), 0, bins - 1)
+    cell = iy * bins + ix
+    count = np.bincount(cell, minlength=bins * bins)
+    cells = np.flatnonzero(count)
+
+    wx, wy = (x1 - x0) / bins, (y1 - y0) / bins
+    out = {
+        "agg":    "grid",
+        "bins":   bins,
+        "window": [float(x0), float(x1), float(y0), float(y1)],
+        "n":      int(len(x)),
+        "x":      (x0 + (cells % bins + 0.5) * wx).tolist(),
+        "y":      (y0 + (cells // bins + 0.5) * wy).tolist(),
+        "count":  count[cells].tolist(),
+    }
+    for name, v in (means or {}).items():
+        v = np.asarray(v, dtype=float)[keep]
+        ok = ~np.isnan(v)
+        total = np.bincount(cell[ok], weights=v[ok], minlength=bins * bins)[cells]
+        n = np.bincount(cell[ok], minlength=bins * bins)[cells]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, total / n, np.nan)
+        out[name] = [None if np.isnan(m) else float(m) for m in mean]
+    for name, v in (modes or {}).items():
+        v = np.asarray(v, dtype=np.int64)[keep]
+        ok = v >= 0
+        k = int(v[ok].max()) + 1 if ok.any() else 1
+        # counts per (cell, value), then the arg-max value per cell
+        votes = np.bincount(cell[ok] * k + v[ok], minlength=bins * bins * k)
+        votes = votes.reshape(bins * bins, k)[cells]
+        out[name] = np.where(votes.max(axis=1) > 0, votes.argmax(axis=1), -1).tolist()
+    return out
@@ -0,0 +1,53 @@
+import time
+from urllib.parse import urlencode
+
+from flask import request
+from flask_caching import Cache
+from flask_caching.backends import SimpleCache
+
+from .data_loader import dataset_version
+from .payload import accepted_encoding
+
+cache = Cache()
+
+
+class LRUCache(SimpleCache):
+    """
+    SimpleCache that keeps at most CACHE_THRESHOLD entries and evicts the
+    least recently read one first (SimpleCache drops by expiry time).
+    """
+    def get(self, key):
+        with self._lock:
+            item = self._cache.pop(key, None)
+            if item is None:
+                return None
+            expires, value = item
+            if expires != 0 and expires <= time.time():
+                return None
+            self._cache[key] = item            # most recently used goes last
+            return self.serializer.loads(value)
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._cache.pop(key, None)
+            return super().set(key, value, timeout)
+
+    def _prune(self):
+        while len(self._cache) >= self._threshold:
+            self._cache.pop(next(iter(self._cache)))
+
+
+def view_key(*args, **kwargs):
+    """
+    Path, sorted query parameters and the dataset version, plus the
+    compression a view may pick (payload.compressed_json). Values are kept
+    exactly as the views read them: "course=X%20" may answer differently
+    from "course=X".
+    """
+    params = sorted(request.args.items(multi=True))
+    key = f"view/{dataset_version()}{request.path}?{urlencode(params)}"
+    encoding = accepted_encoding()
+    return f"{key}#{encoding}" if encoding else key
+
+# responses only change with the data, and the version is part of the key
+cached_view = cache.cached(timeout=0, make_cache_key=view_key)
@@ -1,5 +1,17 @@
 import pandas as pd, ast, numpy as np
 import os
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+# every handler gets a shallow view of the same frame; copy-on-write makes
+# a write to a shared column copy it instead of changing everyone's data
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+log = logging.getLogger(__name__)
 
 PARSED_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -7,10 +19,147 @@ PARSED_PATH = os.path.join(
     'course_stats_parsed.feather'
 )
 
+# written by `preprocess.py --incremental`, one feather file per run
+PARTS_PATH = os.path.join(
+    os.path.dirname(__file__),
+    'data',
+    'course_stats_parsed'
+)
+
+RELOAD_INTERVAL = 5.0          # seconds between checks for a new snapshot
+
+def _sources():
+    return sorted(Path(PARTS_PATH).glob('part-*.feather')) or [Path(PARSED_PATH)]
+
+def _version():
+    """Short hash of the name, mtime and size of every dataset file"""
+    sig = []
+    for p in _sources():
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        sig.append((p.name, st.st_mtime_ns, st.st_size))
+    return hashlib.sha1(repr(sig).encode()).hexdigest()[:12]
+
 def _load_df():
+    parts = sorted(Path(PARTS_PATH).glob('part-*.feather'))
+    if parts:
+        frames = [pd.read_feather(p) for p in parts]
+        df = pd.concat(frames, ignore_index=True)
+        # concat falls back to plain strings when the categories differ
+        for col, dtype in frames[0].dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        return df
     return pd.read_feather(PARSED_PATH)
 
-_df = _load_df()
+class RowIndex:
+    """
+    Sorted row positions for each course code (upper-cased), dept, year and
+    term (title-cased) of a frame, so an endpoint can find its rows without
+    a string operation over the whole column.
+    """
+    def __init__(self, df):
+        self.n = len(df)
+        keys = {
+            'course': df['course_number'].astype('object').str.upper(),
+            'dept':   df['dept'].astype('object'),
+            'year':   df['year'].fillna(-1).astype(int),
+            'term':   df['term'].astype(str).str.strip().str.title(),
+        }
+        pos = pd.Series(np.arange(self.n))
+        self._pos = {name: pos.groupby(key.to_numpy()).indices
+                     for name, key in keys.items()}
+
+    def rows(self, **filters):
+        """
+        Positions of the rows matching every given filter, e.g.
+        rows(dept={"EN.601"}, year={2020, 2021}). Several values of one
+        filter are OR-ed; empty or None filters are ignored.
+        """
+        out = None
+        for name, values in filters.items():
+            if not values:
+                continue
+            idx  = self._pos[name]
+            hits = [idx[v] for v in values if v in idx]
+            if not hits:
+                return np.empty(0, dtype=np.intp)
+            pos = hits[0] if len(hits) == 1 else np.unique(np.concatenate(hits))
+            out = pos if out is None else np.intersect1d(out, pos, assume_unique=True)
+        return np.arange(self.n) if out is None else out
+
+def _snapshot():
+    version = _version()           # before loading: a change mid-load reloads again
+    df = _load_df()
+    return (version, df, RowIndex(df))
+
+# (version, frame, index), replaced as a whole so a reader sees one or the other
+_current = _snapshot()
+_reload_lock = threading.Lock()
+_listeners = []
+_watcher = None
 
 def load_course_data():
-    return _df
\ No newline at end of file
+    """
+    A view of the parsed dataset for one request. It shares every column
+    with the loaded frame (no copy); adding, dropping or assigning columns
+    only affects this view.
+    """
+    return _current[1].copy(deep=False)
+
+def load_indexed_course_data():
+    """load_course_data() plus the RowIndex of the same snapshot"""
+    version, df, index = _current
+    return df.copy(deep=False), index
+
+def load_course_snapshot():
+    """(dataset_version(), load_course_data(), RowIndex) of one snapshot"""
+    version, df, index = _current
+    return version, df.copy(deep=False), index
+
+def dataset_version():
+    return _current[0]
+
+def on_reload(fn):
+    """Register fn(version) to run after a new snapshot is swapped in"""
+    _listeners.append(fn)
+    return fn
+
+def reload(force=False):
+    """
+    Load the dataset again if its files changed since the current snapshot.
+    Requests keep being served from the old snapshot while this runs.
+    Returns True when a new snapshot was swapped in.
+    """
+    global _current
+    with _reload_lock:
+        if _version() == _current[0] and not force:
+            return False
+        _current = _snapshot()
+        version = _current[0]
+    for fn in _listeners:
+        fn(version)
+    log.info("dataset reloaded, version %s (%d rows)", version, len(_current[1]))
+    return True
+
+def start_watcher(interval=RELOAD_INTERVAL):
+    """Poll the dataset files from a daemon thread and reload on change"""
+    global _watcher
+    if _watcher is not None:
+        return _watcher
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                reload()
+            except Exception:
+                # e.g. preprocess.py is replacing the parts right now;
+                # keep serving the old snapshot and try again next round
+                log.exception("dataset reload failed, keeping version %s", _current[0])
+
+    _watcher = threading.Thread(target=loop, name="dataset-watcher", daemon=True)
+    _watcher.start()
+    return _watcher
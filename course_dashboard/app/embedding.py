@@ -0,0 +1,184 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from sklearn.decomposition import PCA
+from sklearn.manifold import TSNE
+from sklearn.cluster import DBSCAN
+
+from . import data_loader
+
+log = logging.getLogger(__name__)
+
+# what the dashboard asks for: PCA or default t-SNE, eps slider 0.5 … 6
+COMMON_EMBEDDINGS = [("pca",), ("tsne", 30.0, 1000)]
+EPS_GRID = np.round(np.arange(0.5, 6.0001, 0.1), 1)
+MIN_SAMPLES = 5
+MAX_EMBEDDINGS = 16
+MAX_LABEL_SETS = 1024
+
+# fits run here, one at a time, never on a request thread
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+
+# scikit-learn 1.5 renamed TSNE's n_iter to max_iter
+_TSNE_ITER = "max_iter" if "max_iter" in TSNE().get_params() else "n_iter"
+
+
+def embedding_key(qp) -> tuple:
+    """("pca",) or ("tsne", perplexity, n_iter) from query parameters"""
+    if qp.get("method", "pca").strip().lower() == "tsne":
+        # 30, "30.0" and 30.04 are the same fit
+        return ("tsne", round(float(qp.get("perplexity", 30)), 1), int(qp.get("n_iter", 1000)))
+    return ("pca",)
+
+def dbscan_key(qp) -> tuple:
+    return (round(float(qp.get("eps", 2.0)), 3), int(qp.get("min_samples", MIN_SAMPLES)))
+
+
+class EmbeddingStore:
+    """
+    2-D embeddings, DBSCAN labels and nearest neighbours of the rows with
+    every _mean metric, for one dataset snapshot. Each embedding is fitted
+    once, in the background pool; requests for the same parameters share
+    the result.
+    """
+    def __init__(self, version, df, rows):
+        self.version = version
+        self.df      = df
+        self.rows    = rows                   # data_loader.RowIndex of df
+        self.metrics = [c for c in df.columns if c.endswith("_mean")]
+        X            = df[self.metrics].dropna()
+        self.index   = X.index
+        self.X_std   = StandardScaler().fit_transform(X) if len(X) else X.to_numpy()
+        # df positions of the X rows, and the X row of each df position (-1: none)
+        self.positions = df.index.get_indexer(X.index)
+        self.row_of    = np.full(len(df), -1)
+        self.row_of[self.positions] = np.arange(len(X))
+        self.codes     = df["course_number"].astype(object).str.upper().fillna("").to_numpy()
+        self._embeddings = OrderedDict()
+        self._labels     = OrderedDict()
+        self._lock       = threading.Lock()
+
+    def _fit(self, key):
+        if key[0] == "tsne":
+            params = {"perplexity": key[1], _TSNE_ITER: key[2], "random_state": 0}
+            return TSNE(n_components=2, **params).fit_transform(self.X_std)
+        return PCA(n_components=2, random_state=0).fit_transform(self.X_std)
+
+    def submit(self, key):
+        """Future of the embedding for key, started if nobody asked before"""
+        with self._lock:
+            fut = self._embeddings.get(key)
+            if fut is not None:
+                self._embeddings.move_to_end(key)
+                return fut
+            fut = self._embeddings[key] = _pool.submit(self._fit, key)
+            while len(self._embeddings) > MAX_EMBEDDINGS:
+                self._embeddings.popitem(last=False)
+        fut.add_done_callback(lambda fut: self._forget_failed(key, fut))
+        return fut
+
+    def _forget_failed(self, key, fut):
+        # a fit that raised (e.g. n_iter < 250) is not kept; asking again retries
+        if fut.exception() is not None:
+            with self._lock:
+                if self._embeddings.get(key) is fut:
+                    del self._embeddings[key]
+
+    def embedding(self, key) -> np.ndarray:
+        return self.submit(key).result()
+
+    def cached_labels(self, key, dkey):
+        with self._lock:
+            lbls = self._labels.get((key, dkey))
+            if lbls is not None:
+                self._labels.move_to_end((key, dkey))
+            return lbls
+
+    def labels(self, key, dkey) -> np.ndarray:
+        lbls = self.cached_labels(key, dkey)
+        if lbls is None:
+            lbls = self._dbscan(key, dkey, self.embedding(key))
+        return lbls
+
+    def _dbscan(self, key, dkey, emb) -> np.ndarray:
+        lbls = DBSCAN(eps=dkey[0], min_samples=dkey[1]).fit_predict(emb)
+        with self._lock:
+            self._labels[(key, dkey)] = lbls
+            while len(self._labels) > MAX_LABEL_SETS:
+                self._labels.popitem(last=False)
+        return lbls
+
+    def nearest(self, targets, m) -> np.ndarray:
+        """
+        df positions of the m rows closest (Euclidean, standardized
+        metrics) to the mean vector of the target X rows, nearest first.
+        """
+        q = self.X_std[targets].mean(axis=0)
+        d = ((self.X_std - q) ** 2).sum(axis=1)
+        if m < len(d):
+            top = np.argpartition(d, m)[:m]
+        else:
+            top = np.arange(len(d))
+        return self.positions[top[np.argsort(d[top], kind="stable")]]
+
+    def similar(self, positions, k) -> np.ndarray:
+        """
+        df positions of the k courses most similar to the rows at
+        `positions`: one row (the closest offering) per course, nearest
+        first, leaving out the targets' own course codes.
+        """
+        targets = self.row_of[positions]
+        targets = targets[targets >= 0]
+        if not len(targets) or k <= 0:
+            return np.empty(0, dtype=np.intp)
+        own = set(self.codes[positions])
+        m = 4 * k
+        while True:
+            near  = self.nearest(targets, m)
+            near  = near[~np.isin(self.codes[near], list(own))]
+            _, first = np.unique(self.codes[near], return_index=True)
+            picks = near[np.sort(first)][:k]
+            if len(picks) == k or m >= len(self.index):
+                return picks
+            m *= 4
+
+    def warm(self):
+        """Queue the common embeddings and their labels for the eps grid"""
+        def labels_for(key, emb):
+            # runs on _pool, so it must not wait for another fit: the
+            # embedding is handed in, never looked up (it may be evicted)
+            for eps in EPS_GRID:
+                dkey = (float(eps), MIN_SAMPLES)
+                if self.cached_labels(key, dkey) is None:
+                    self._dbscan(key, dkey, emb)
+
+        def queue_labels(fut, key):
+            if fut.exception() is not None:
+                log.error("embedding %s failed: %s", key, fut.exception())
+                return
+            try:
+                _pool.submit(labels_for, key, fut.result())
+            except RuntimeError:        # interpreter shutting down
+                pass
+
+        for key in COMMON_EMBEDDINGS:
+            self.submit(key).add_done_callback(lambda fut, key=key: queue_labels(fut, key))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def embeddings() -> EmbeddingStore:
+    """The store for the current dataset version, created (and warmed) on first use"""
+    global _store
+    with _store_lock:
+        version, df, rows = data_loader.load_course_snapshot()
+        if _store is None or _store.version != version:
+            _store = EmbeddingStore(version, df, rows)
+            _store.warm()
+            log.info("embedding store for dataset version %s", version)
+        return _store
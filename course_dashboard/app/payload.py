@@ -0,0 +1,52 @@
+import base64
+import gzip
+
+import numpy as np
+import pandas as pd
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:              # optional; gzip is always available
+    brotli = None
+
+MIN_COMPRESS = 1024              # bytes; smaller bodies go out as they are
+
+
+def typed_array(values, dtype) -> dict:
+    """
+    {"dtype": "f8", "bdata": <base64>}: the little-endian bytes of a numeric
+    column, decoded in the browser into a Float64Array / Int32Array / …
+    """
+    arr = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {"dtype": arr.dtype.str[1:], "bdata": base64.b64encode(arr).decode("ascii")}
+
+def dict_encode(col: pd.Series, binary=False) -> dict:
+    """
+    {"values": [distinct strings], "codes": [index per row, -1 = missing]}
+    for a categorical or string column; codes as a typed array if binary.
+    """
+    cat = col.astype("category").cat.remove_unused_categories()
+    codes = cat.cat.codes.to_numpy()
+    return {"values": cat.cat.categories.tolist(),
+            "codes":  typed_array(codes, codes.dtype) if binary else codes.tolist()}
+
+def accepted_encoding() -> str | None:
+    accept = request.headers.get("Accept-Encoding", "")
+    if brotli is not None and "br" in accept:
+        return "br"
+    if "gzip" in accept:
+        return "gzip"
+    return None
+
+def compressed_json(payload):
+    """JSON response, brotli- or gzip-compressed when the client accepts it"""
+    body = current_app.json.dumps(payload).encode()
+    resp = current_app.response_class(body, mimetype="application/json")
+    resp.vary.add("Accept-Encoding")
+    encoding = accepted_encoding()
+    if encoding and len(body) >= MIN_COMPRESS:
+        resp.set_data(brotli.compress(body) if encoding == "br"
+                      else gzip.compress(body, compresslevel=6))
+        resp.headers["Content-Encoding"] = encoding
+    return resp
@@ -1,14 +1,17 @@
 from flask import Blueprint, request, jsonify
 import numpy as np
 import pandas as pd
-import re
-from ..data_loader import load_course_data
+from ..data_loader import load_course_data, load_indexed_course_data
+from ..caching import cached_view
+from ..payload import typed_array, dict_encode, compressed_json
+from ..aggregate import grid, in_window, sample, window_arg
 import collections
 
 analytics_bp = Blueprint("analytics", __name__)
 
 
 @analytics_bp.route("/top10")
+@cached_view
 def top10():
     df = load_course_data()
     teach_col = "The instructor's teaching effectiveness is:_mean"
@@ -60,70 +63,87 @@ def time_key(row: pd.Series) -> str:
     return f"{int(row.year)} {row.term}"
 
 
-def linear_trend(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
-    mask = (~np.isnan(xs)) & (~np.isnan(ys))
-    if mask.sum() < 2:
-        return np.full_like(xs, np.nan, dtype=float)
-
-    m, b = np.polyfit(xs[mask], ys[mask], 1)
-    return m * xs + b
+def linear_trends(xs: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """
+    Least-squares line through every row of Y (groups × xs, NaN = missing),
+    evaluated at xs. Closed form on masked sums, so all groups are fitted
+    in one pass; rows with fewer than two points come back all NaN.
+    """
+    W  = ~np.isnan(Y)
+    Y0 = np.where(W, Y, 0.0)
+    xc = xs - xs.mean() if len(xs) else xs      # centred for conditioning
+    n   = W.sum(axis=1)
+    sx  = W @ xc
+    sy  = Y0.sum(axis=1)
+    sxx = W @ (xc * xc)
+    sxy = Y0 @ xc
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        b = (sy - m * sx) / n
+    trend = m[:, None] * xc + b[:, None]
+    trend[n < 2] = np.nan
+    return trend
 
 def nan2none(lst):
     return [None if pd.isna(v) else v for v in lst]
 
-def clean_instructor(name: str) -> str:
-    if pd.isna(name):
-        return ""
-    txt = str(name).strip()
-    txt = re.sub(r"\s+", " ", txt)
-    txt = re.sub(r"[.,]\s*$", "", txt)
-    return txt
-
-def all_term_dates(frame: pd.DataFrame) -> list[str]:
-    dates = (
-        frame.assign(
-            _date = lambda d:
-                d["year"].astype(str) + "-" +
-                d["term"].map(lambda t: MONTH_FOR_TERM.get(t, "01")) + "-01"
-        )
-        ._date.unique()
-    )
-    return sorted(dates)
+def term_dates(frame: pd.DataFrame) -> pd.Series:
+    """"YYYY-MM-01" per row (month from MONTH_FOR_TERM); rows without a year are dropped"""
+    frame = frame[frame["year"].notna()]
+    month = frame["term"].astype(str).map(MONTH_FOR_TERM).fillna("01")
+    return frame["year"].astype(int).astype(str) + "-" + month + "-01"
+
+def timeseries(frame: pd.DataFrame, by: str, metric: str) -> dict:
+    """
+    Mean of metric per `by` group and term on a shared timeline, plus each
+    group's linear trend. The groups are pivoted into one group × term
+    matrix and fitted together by linear_trends.
+    """
+    dates = term_dates(frame)
+    frame = frame.loc[dates.index]
+    timeline = sorted(dates.unique())
+
+    means = (frame[metric].groupby([frame[by], dates], observed=True).mean()
+                          .unstack().reindex(columns=timeline))
+    Y  = means.to_numpy(dtype=float)
+    xs = np.array([int(d[:4]) + month_frac(d) for d in timeline], dtype=float)
+    trend = linear_trends(xs, Y)
+
+    return {
+        "metric":   metric,
+        "series":   [{"label": label,
+                      "x":     timeline,
+                      "y":     nan2none(y.tolist()),
+                      "trend": nan2none(t.tolist())}
+                     for label, y, t in zip(means.index, Y, trend)],
+        "timeline": timeline,
+    }
 
 def month_frac(date_str: str) -> float:
     return FRAC_FOR_MONTH.get(date_str[5:7], 0.0)
 
-_level_pat = re.compile(r"\.(\d{3})$")
-
-def course_level(code: str) -> float | None:
-    m = _level_pat.search(str(code).strip())
-    if not m:
-        return None
-    return (int(m.group(1)) // 100) * 100
-
 @analytics_bp.route("/scatter_json")
+@cached_view
 def scatter_json():
-    df = load_course_data()
-
-    df["instructor"] = df["instructor"].apply(clean_instructor)
-
-    if "course_level" not in df.columns:
-        df["course_level"] = df["course_number"].apply(course_level)
-
-    if "size" not in df.columns:
-        pat = re.compile(r"\b(\d+)\s+of\s+(\d+)\s+responded", re.I)
-        def _size(text: str) -> float | None:
-            m = pat.search(str(text));  return float(m.group(2)) if m else None
-        meta_col = next((c for c in ("file_name", "filename", "file")
-                         if c in df.columns), None)
-        if meta_col:
-            df["size"] = df[meta_col].apply(_size)
+    """
+    One point per evaluation (or per grid cell with agg=grid). year / term
+    (comma-separated) filter the rows.
+    format=columnar sends the string columns dictionary-encoded as
+    {"values": [...], "codes": [...]}; format=binary additionally sends the
+    numeric columns and codes as base64 typed arrays {"dtype", "bdata"}.
+    """
+    df, index = load_indexed_course_data()
 
     x_col     = request.args.get("x",  "Compared to other Hopkins courses at this level, the workload for this course is:_mean")
     y_col     = request.args.get("y",  "The instructor's teaching effectiveness is:_mean")
     color_col = request.args.get("color") or None
-    year_filt = request.args.get("year")  or None
-    term_filt = request.args.get("term")  or None
+    years     = {int(float(y)) for y in request.args.get("year", "").split(",") if y.strip()}
+    terms     = {t.strip().title() for t in request.args.get("term", "").split(",") if t.strip()}
+    fmt       = request.args.get("format", "json")
+
+    metrics = [c for c in df.columns
+               if (c.endswith("_mean") or c in ("size", "course_level"))]
+    df = df.iloc[index.rows(year=years, term=terms)]
 
     cols = [x_col, y_col, "course_level",
             "course_number", "course_name", "instructor", "year", "term"]
@@ -134,31 +154,63 @@ def scatter_json():
     dropped = len(df) - len(clean)
 
     payload = {
-        "x":           clean[x_col].tolist(),
-        "y":           clean[y_col].tolist(),
-        "course":      clean["course_number"].tolist(),
-        "course_name": clean["course_name"].tolist(),
-        "instructor":  clean["instructor"].tolist(),
-        "year":        clean["year"].astype(int).tolist(),
-        "term":        clean["term"].tolist(),
-        "metrics": [c for c in df.columns
-                    if (c.endswith("_mean")
-                        or c in ("size", "course_level"))],
+        "metrics": metrics,
         "warning": (f"{dropped} record(s) excluded because of missing "
                     f"{x_col} / {y_col}") if dropped else ""
     }
+
+    # agg=grid: count and mean colour per cell of a bins × bins grid;
+    # agg=sample: at most max_points points. Both honour the zoom window
+    # xmin / xmax / ymin / ymax.
+    agg    = request.args.get("agg")
+    window = window_arg(request.args)
+    xs, ys = clean[x_col].to_numpy(dtype=float), clean[y_col].to_numpy(dtype=float)
+    if agg == "grid":
+        color = (clean[color_col] if color_col
+                 and pd.api.types.is_numeric_dtype(clean[color_col]) else None)
+        payload.update(grid(xs, ys, int(request.args.get("bins", 50)), window,
+                            means={"color": color} if color is not None else None))
+        return compressed_json(payload)
+    if agg == "sample" or any(w is not None for w in window):
+        sel = np.flatnonzero(in_window(xs, ys, window))
+        if agg == "sample":
+            sel = sample(sel, int(request.args.get("max_points", 5000)))
+        clean = clean.iloc[sel]
+    strings = {"course": "course_number", "course_name": "course_name",
+               "instructor": "instructor", "term": "term"}
+    if fmt in ("columnar", "binary"):
+        binary = fmt == "binary"
+        flt    = "f4" if binary else "f8"     # float32 is plenty for plotting
+        num = ((lambda c, t: typed_array(clean[c].to_numpy(), t)) if binary
+               else (lambda c, t: clean[c].astype(t).tolist()))
+        payload.update({k: dict_encode(clean[c], binary) for k, c in strings.items()})
+        payload.update(x=num(x_col, flt), y=num(y_col, flt), year=num("year", "i2"))
+        if color_col:
+            payload["color"] = (dict_encode(clean[color_col], binary)
+                                if not pd.api.types.is_numeric_dtype(clean[color_col])
+                                else num(color_col, flt))
+        return compressed_json(payload)
+
+    # a missing instructor has always been sent as "" here
+    clean = clean.assign(instructor=clean["instructor"].astype(object).fillna(""))
+    payload.update({
+        "x":           clean[x_col].tolist(),
+        "y":           clean[y_col].tolist(),
+        "year":        clean["year"].astype(int).tolist(),
+        **{k: clean[c].tolist() for k, c in strings.items()},
+    })
     if color_col:
         payload["color"] = clean[color_col].tolist()
 
-    return jsonify(payload)
+    return compressed_json(payload)
 
 
 
 
 @analytics_bp.route("/dept_timeseries")
+@cached_view
 def dept_timeseries():
-    df = load_course_data()
-    df["instructor"] = df["instructor"].apply(clean_instructor)
+    df, index = load_indexed_course_data()
 
     depts  = [d.strip().upper() for d in request.args.get("depts", "").split(",") if d]
     metric = request.args.get(
@@ -166,53 +218,15 @@ def dept_timeseries():
     years  = {int(float(y)) for y in request.args.get("years",  "").split(",") if y}
     terms  = {t.strip().title() for t in request.args.get("terms", "").split(",") if t}
 
-    df["dept"] = df["course_number"].str.split(".").str[0:2].str.join(".")
-    if depts:
-        df = df[df["dept"].isin(depts)]
-    if years:
-        df = df[df["year"].fillna(-1).astype(int).isin(years)]
-    if terms:
-        df = df[df["term"].astype(str).str.strip().str.title().isin(terms)]
-
-    timeline = all_term_dates(df)
-
-    MONTH_TO_FRAC = {m: TERM_RANK[t] / len(TERM_ORDER)
-                     for t, m in MONTH_FOR_TERM.items()}
-
-    out = {"metric": metric, "series": [], "timeline": timeline}
-    for dept, g in df.groupby(["dept", "year", "term"])[metric].mean().reset_index().groupby("dept"):
-
-        date_map = dict(zip(
-            g["year"].astype(str) + "-" +
-            g["term"].map(lambda t: MONTH_FOR_TERM.get(t, "01")) + "-01",
-            g[metric]
-        ))
-        ys = np.array([date_map.get(d, np.nan) for d in timeline], dtype=float)
-
-        xs_all = (np.array([int(d[:4]) for d in timeline], dtype=float) +
-                  np.array([MONTH_TO_FRAC.get(d[5:7], 0.0) for d in timeline]))
-
-        mask = ~np.isnan(ys)
-        if mask.sum() >= 2:
-            m, b      = np.polyfit(xs_all[mask], ys[mask], 1)
-            trend_all = m * xs_all + b
-        else:
-            trend_all = np.full_like(xs_all, np.nan, dtype=float)
-
-        out["series"].append({
-            "label": dept,
-            "x":     timeline,
-            "y":     nan2none(ys.tolist()),
-            "trend": nan2none(trend_all.tolist())
-        })
+    df = df.iloc[index.rows(dept=depts, year=years, term=terms)]
 
-    return jsonify(out)
+    return jsonify(timeseries(df, "dept", metric))
 
 
 @analytics_bp.route("/course_timeseries")
+@cached_view
 def course_timeseries():
-    df = load_course_data()
-    df["instructor"] = df["instructor"].apply(clean_instructor)
+    df, index = load_indexed_course_data()
 
     code = request.args.get("course")
     if not code:
@@ -223,92 +237,56 @@ def course_timeseries():
     years  = {int(float(y)) for y in request.args.get("years",  "").split(",") if y}
     terms  = {t.strip().title() for t in request.args.get("terms", "").split(",") if t}
 
-    df = df[df["course_number"].str.upper() == code.upper()]
-    if years:
-        df = df[df["year"].fillna(-1).astype(int).isin(years)]
-    if terms:
-        df = df[df["term"].astype(str).str.strip().str.title().isin(terms)]
-
-    timeline = all_term_dates(df)
-    MONTH_TO_FRAC = {m: TERM_RANK[t] / len(TERM_ORDER)
-                     for t, m in MONTH_FOR_TERM.items()}
-
-    out = {"metric": metric, "series": [], "timeline": timeline}
-    for instr, g in df.groupby(["instructor", "year", "term"])[metric].mean().reset_index().groupby("instructor"):
-
-        date_map = dict(zip(
-            g["year"].astype(str) + "-" +
-            g["term"].map(lambda t: MONTH_FOR_TERM.get(t, "01")) + "-01",
-            g[metric]
-        ))
-        ys = np.array([date_map.get(d, np.nan) for d in timeline], dtype=float)
-
-        xs_all = (np.array([int(d[:4]) for d in timeline], dtype=float) +
-                  np.array([MONTH_TO_FRAC.get(d[5:7], 0.0) for d in timeline]))
-
-        mask = ~np.isnan(ys)
-        if mask.sum() >= 2:
-            m, b      = np.polyfit(xs_all[mask], ys[mask], 1)
-            trend_all = m * xs_all + b
-        else:
-            trend_all = np.full_like(xs_all, np.nan, dtype=float)
-
-        out["series"].append({
-            "label": instr,
-            "x":     timeline,
-            "y":     nan2none(ys.tolist()),
-            "trend": nan2none(trend_all.tolist())
-        })
+    df = df.iloc[index.rows(course=[code.upper()], year=years, term=terms)]
+    # rows without an instructor form their own "" series
+    df = df.assign(instructor=df["instructor"].astype(object).fillna(""))
 
-    return jsonify(out)
+    return jsonify(timeseries(df, "instructor", metric))
+
+from ..embedding import embeddings, embedding_key, dbscan_key
 
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-from sklearn.cluster import DBSCAN
-import joblib
-
-
-def _fit_embedding(X: pd.DataFrame, qp: dict[str, str]) -> np.ndarray:
-    method = qp.get("method", "pca").lower()
-    X_std  = StandardScaler().fit_transform(X)
-    if method == "tsne":
-        params = dict(perplexity=float(qp.get("perplexity", 30)),
-                      n_iter=int(qp.get("n_iter", 1000)),
-                      random_state=0)
-        return TSNE(n_components=2, **params).fit_transform(X_std)
-    return PCA(n_components=2, random_state=0).fit_transform(X_std)
-
-def _dbscan_labels(emb, qp):
-    return DBSCAN(
-        eps=float(qp.get("eps", 2.0)),
-        min_samples=int(qp.get("min_samples", 5)),
-    ).fit_predict(emb)
 
 @analytics_bp.route("/course_embedding")
+@cached_view
 def course_embedding():
-    df       = load_course_data()
-    metrics  = [c for c in df.columns if c.endswith("_mean")]
-    X        = df[metrics].dropna()
-    meta     = df.loc[X.index, ["course_number", "course_name",
-                                "instructor", "year", "term"]]
-    cache    = joblib.Memory("/tmp/jhu_eval_cache", verbose=0)
-    emb      = cache.cache(_fit_embedding)(X, request.args)
-
+    store    = embeddings()
+    meta     = store.df.loc[store.index, ["course_number", "course_name", "instructor",
+                                          "year", "term", "dept", "course_level"]]
+    key      = embedding_key(request.args)
+    emb      = store.embedding(key)
+    labels   = (store.labels(key, dbscan_key(request.args))
+                if request.args.get("cluster") == "dbscan" else None)
+
+    # agg=grid: counts (and the commonest cluster) per cell of a bins × bins
+    # grid; agg=sample: at most max_points points. Both honour the zoom
+    # window xmin / xmax / ymin / ymax.
+    agg    = request.args.get("agg")
+    window = window_arg(request.args)
+    if agg == "grid":
+        return jsonify(grid(emb[:, 0], emb[:, 1], int(request.args.get("bins", 50)), window,
+                            modes={"cluster": labels} if labels is not None else None))
+    if agg == "sample" or any(w is not None for w in window):
+        sel = np.flatnonzero(in_window(emb[:, 0], emb[:, 1], window))
+        if agg == "sample":
+            sel = sample(sel, int(request.args.get("max_points", 5000)))
+        emb, meta = emb[sel], meta.iloc[sel]
+        labels = labels[sel] if labels is not None else None
+
+    # 1 for 100-level, 2 for 200-level, …
+    level   = [None if pd.isna(v) else int(v) // 100 for v in meta.course_level]
     payload = {
         "x"   : emb[:, 0].tolist(),
         "y"   : emb[:, 1].tolist(),
         "course"    : meta.course_number.tolist(),
         "name"      : meta.course_name.tolist(),
-        "dept"      : meta.course_number.str.split('.').str[0:2].str.join('.').tolist(),
-        "level"     : meta.course_number.str.extract(r'\.(\d)').iloc[:,0].fillna('').tolist(),
-        "instructor": meta.instructor.tolist(),
+        "dept"      : nan2none(meta.dept.tolist()),
+        "level"     : level,
+        "instructor": nan2none(meta.instructor.tolist()),
         "year"      : meta.year.astype(int).tolist(),
         "term"      : meta.term.tolist()
     }
 
-    if request.args.get("cluster") == "dbscan":
-        labels = _dbscan_labels(emb, request.args)
+    if labels is not None:
         payload["cluster"] = labels.tolist()
 
         clust_stats = collections.defaultdict(list)
@@ -317,35 +295,28 @@ def course_embedding():
                 continue
             clust_stats[lbl].append(row.course_number)
         payload["cluster_stats"] = {int(k): v for k, v in clust_stats.items()}
-        level = (
-            meta.course_number
-                .str.extract(r'\.(\d{3})$')[0]
-                .astype('Int64')
-                .floordiv(100)
-        )
-        payload["level"] = level.tolist()
 
     return jsonify(payload)
 
 @analytics_bp.route("/cluster_summary")
+@cached_view
 def cluster_summary():
     """
     Either:
       /cluster_summary?courses=AS.020.101,…
     or
-      /cluster_summary?cluster=7&method=tsne&eps=2.0  (re-runs DBSCAN server-side)
+      /cluster_summary?cluster=7&method=tsne&eps=2.0  (labels from the embedding store)
     """
-    df       = load_course_data()
-    metrics  = [c for c in df.columns if c.endswith("_mean")]
+    store    = embeddings()
+    df       = store.df
+    metrics  = store.metrics
 
     if 'cluster' in request.args:
-        qp   = request.args.to_dict()
-        X    = df[metrics].dropna()
-        emb  = _fit_embedding(X, qp)
-        lbls = _dbscan_labels(emb, qp)
+        qp   = request.args
+        lbls = store.labels(embedding_key(qp), dbscan_key(qp))
         target = int(qp['cluster'])
         mask   = lbls == target
-        sub    = df.loc[X.index[mask]]
+        sub    = df.loc[store.index[mask]]
     else:
         courses = [c.strip() for c in request.args.get("courses", "").split(',') if c]
         sub     = df[df.course_number.isin(courses)]
@@ -355,8 +326,8 @@ def cluster_summary():
 
     out = {
         "n_courses"    : int(sub.course_number.nunique()),
-        "top_departments" : (sub.course_number.str.split('.').str[0:2]
-                             .str.join('.').value_counts().head(3).index.tolist()),
+        "top_departments" : (sub.dept.astype(object).value_counts()
+                             .head(3).index.tolist()),
         "mean_effectiveness" : round(sub["The instructor's teaching effectiveness is:_mean"].mean(), 2),
         "mean_workload"      : round(sub["Compared to other Hopkins courses at this level, the workload for this course is:_mean"].mean(), 2)
     }
@@ -364,42 +335,25 @@ def cluster_summary():
     return jsonify(out)
 
 @analytics_bp.route("/recommend")
+@cached_view
 def recommend():
-    df       = load_course_data()
-    metrics  = [c for c in df.columns if c.endswith("_mean")]
+    """
+    Courses whose metric profile is closest to the given course (optionally
+    one year / term of it), most similar first, one offering per course:
+      /recommend?course=EN.601.226&year=2021&term=Fall&k=10
+    """
+    store = embeddings()
 
     code  = request.args.get("course", "").strip()
     year  = request.args.get("year")
     term  = request.args.get("term")
+    k     = int(request.args.get("k", 10))
 
-    mask = df.course_number.str.upper() == code.upper()
-    if year:
-        mask &= df["year"].fillna(-1).astype(int) == int(year)
-    if term:
-        mask &= df["term"].astype(str).str.strip().str.title() == term.strip().title()
-    if not mask.any():
-        return jsonify([])
-
-    X      = df[metrics].dropna()
-    emb    = _fit_embedding(X, request.args)
-    labels = _dbscan_labels(emb, request.args)
-
-    target_idx  = set(df[mask].index)
-    target_lbls = {lbl for i, lbl in zip(X.index, labels) if i in target_idx}
-    if not target_lbls or -1 in target_lbls:
-        return jsonify([])
-
-    lbl         = target_lbls.pop()
-    rec_idx     = [i for i, l in zip(X.index, labels)
-                   if l == lbl and i not in target_idx]
-    sub = df.loc[rec_idx,
-             ["course_number", "course_name",
-              "instructor", "year", "term"]]
-    sub = sub[sub.course_number.str.upper() != code.upper()]
-    sub = (sub
-       .sort_values(["course_number", "year", "term"])
-       .drop_duplicates(subset=["course_number", "year", "term"],
-                        keep="first"))
-    sub = sub.drop_duplicates()
-
-    return jsonify(sub.to_dict(orient="records"))
\ No newline at end of file
+    rows = store.rows.rows(course=[code.upper()],
+                           year={int(year)} if year else None,
+                           term={term.strip().title()} if term else None)
+    picks = store.similar(rows, k)
+
+    sub = store.df.iloc[picks][["course_number", "course_name",
+                                "instructor", "year", "term"]]
+    return jsonify(sub.to_dict(orient="records"))
@@ -1,27 +1,80 @@
 from flask import Blueprint, render_template, request
-from app.data_loader import load_course_data
-from app.routes.helper import parse_term, summarize_trend, DEPT_CODES
+from app.data_loader import load_course_snapshot
+from app.routes.helper import DEPT_CODES
+import numpy as np
 import pandas as pd
-import re
 
 rec_bp = Blueprint("recommend", __name__)
 
+TEACHING  = "The instructor's teaching effectiveness is:_mean"
+CHALLENGE = "The intellectual challenge of this course is:_mean"
+WORKLOAD  = "Compared to other Hopkins courses at this level, the workload for this course is:_mean"
+
+def trend_summaries(frame):
+    """
+    helper.summarize_trend for every (course_number, instructor) at once:
+    teaching score of the latest term minus the earliest one.
+    """
+    pts = frame[frame[TEACHING].notna() & frame["term_date"].notna()]
+    pts = pts.sort_values("term_date", kind="stable")
+    ends = (pts.groupby(["course_number", "instructor"], observed=True)[TEACHING]
+               .agg(["first", "last", "size"]))
+    delta = ends["last"] - ends["first"]
+    return pd.Series(
+        np.select([ends["size"] < 2, delta.abs() < 0.1, delta > 0],
+                  ["Not enough data", "Stayed the same", "Improved"], "Declined"),
+        index=ends.index)
+
+def recommendations(frame):
+    """Per course / instructor means with >= 5 respondents, best taught first"""
+    grouped = frame.groupby(
+        ["course_number", "course_name", "instructor"], as_index=False, observed=True
+    ).agg({
+        TEACHING: "mean",
+        CHALLENGE: "mean",
+        WORKLOAD: "mean",
+        "num_respondents": "sum",
+    })
+
+    grouped = grouped[grouped["num_respondents"] >= 5]
+    grouped = grouped.sort_values(by=[TEACHING, CHALLENGE], ascending=[False, False])
+
+    keys = pd.MultiIndex.from_frame(grouped[["course_number", "instructor"]])
+    grouped["summary"] = (trend_summaries(frame).reindex(keys)
+                          .fillna("Not enough data").to_numpy())
+    for col in (TEACHING, CHALLENGE, WORKLOAD):
+        # Python's round, not numpy's: 3.825 shows as 3.83 like it always did
+        grouped[col] = grouped[col].map(lambda v: round(v, 2))
+
+    return (grouped.rename(columns={TEACHING:  "teaching_score",
+                                    CHALLENGE: "challenge_score",
+                                    WORKLOAD:  "workload_score"})
+                   [["course_number", "course_name", "instructor", "teaching_score",
+                     "challenge_score", "workload_score", "summary"]]
+                   .to_dict(orient="records"))
+
+_options = (None, None)
+
+def dropdown_options(version, df):
+    """Course, instructor and level choices, computed once per dataset version"""
+    global _options
+    cached_version, options = _options
+    if cached_version != version:
+        options = (
+            sorted(df["course_number"].dropna().unique().tolist()),
+            sorted(df["instructor"].dropna().unique().tolist()),
+            [f"{int(lvl):03d}" for lvl in sorted(df["course_level"].dropna().unique())],
+        )
+        _options = (version, options)
+    return options
+
 @rec_bp.route("/recommend", methods=["GET", "POST"])
 def recommend():
-    df = load_course_data()
-    df.columns = df.columns.str.strip()
-
-    if "term" in df.columns and "year" in df.columns:
-        df[["term_date", "term_label"]] = df.apply(
-            lambda row: pd.Series(parse_term(row["term"], row["year"])), axis=1
-        )
-    else:
-        df["term_date"] = pd.NaT
-        df["term_label"] = "Unknown"
+    version, df, _ = load_course_snapshot()
 
     results = []
     filter_type = request.form.get("filter_type") if request.method == "POST" else None
-    filtered_df = df.copy()
+    filtered_df = df
 
     if request.method == "POST":
         selected_course = request.form.get("course_number")
@@ -35,70 +88,21 @@ def recommend():
             filtered_df = filtered_df[filtered_df["instructor"] == selected_professor]
 
         if filter_type == "level" and selected_level:
-            def extract_level(code):
-                match = re.match(r".*?(\d{3})$", code)
-                if match:
-                    return match.group(1)[0] + "00"
-                return None
-
-            df["course_level"] = df["course_number"].dropna().apply(extract_level)
-            filtered_df = df[df["course_level"] == selected_level]
+            # anything but a level number matches nothing, as it always did
+            level = float(selected_level) if selected_level.strip().isdigit() else np.nan
+            filtered_df = df[df["course_level"] == level]
 
         if not filtered_df.empty:
-            grouped = filtered_df.groupby(
-                ["course_number", "course_name", "instructor"], as_index=False
-            ).agg({
-                "The instructor's teaching effectiveness is:_mean": "mean",
-                "The intellectual challenge of this course is:_mean": "mean",
-                "Compared to other Hopkins courses at this level, the workload for this course is:_mean": "mean",
-                "num_respondents": "sum",
-            })
-
-            grouped = grouped[grouped["num_respondents"] >= 5]
-            grouped = grouped.sort_values(
-                by=[
-                    "The instructor's teaching effectiveness is:_mean",
-                    "The intellectual challenge of this course is:_mean",
-                ],
-                ascending=[False, False],
-            )
-
-            for _, row in grouped.iterrows():
-                subset = filtered_df[
-                    (filtered_df["course_number"] == row["course_number"]) &
-                    (filtered_df["instructor"] == row["instructor"])
-                ]
-                scores = subset["The instructor's teaching effectiveness is:_mean"].dropna().tolist()
-                dates = subset["term_date"].dropna().tolist()
-                trend_summary = summarize_trend(scores, dates)
-
-                results.append({
-                    "course_number": row["course_number"],
-                    "course_name": row["course_name"],
-                    "instructor": row["instructor"],
-                    "teaching_score": round(row["The instructor's teaching effectiveness is:_mean"], 2),
-                    "challenge_score": round(row["The intellectual challenge of this course is:_mean"], 2),
-                    "workload_score": round(row["Compared to other Hopkins courses at this level, the workload for this course is:_mean"], 2),
-                    "summary": trend_summary,
-                })
-
-    all_courses = sorted(df["course_number"].dropna().unique().tolist())
-    all_instructors = sorted(df["instructor"].dropna().unique().tolist())
-
-    def extract_level(code):
-        match = re.match(r".*?(\d{3})$", code)
-        if match:
-            return match.group(1)[0] + "00"
-        return None
-
-    levels = sorted({extract_level(code) for code in all_courses if extract_level(code)})
+            results = recommendations(filtered_df)
+
+    courses, instructors, levels = dropdown_options(version, df)
 
     return render_template(
         "rec.html",
         dept_codes=DEPT_CODES,
         results=results,
         filter_type=filter_type,
-        courses=all_courses,
-        instructors=all_instructors,
+        courses=courses,
+        instructors=instructors,
         levels=levels,
     )
@@ -1,7 +1,13 @@
 import pandas as pd
-import ast
+import re
+import io
+import sys
+import json
+import shutil
+import hashlib
 import numpy as np
 import os
+from pathlib import Path
 
 RAW_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -9,25 +15,137 @@ RAW_PATH = os.path.join(
     'data',
     'all_course_stats.csv'
 )
-df = pd.read_csv(RAW_PATH)
+# Parquet dataset written by extract.py's BatchWriter (preferred over the CSV)
+STORE_PATH = os.path.join(
+    os.path.dirname(__file__),
+    'app',
+    'data',
+    'all_course_stats'
+)
+META_COLS = ['file', 'course_number', 'course_name', 'instructor',
+             'year', 'term', 'num_respondents']
+
+SCORES = np.arange(6)          # histogram buckets 0 (N/A) … 5
+_pair_pat = re.compile(r'\((\d+),\s*(\d+)\)')
+
+def hist_matrix(col):
+    """
+    Decode a column of "[(1, 0), (2, 0), …, (0, 0)]" strings into an
+    (n_rows, 6) int matrix of counts indexed by score, without literal_eval.
+    Missing cells decode to all zeros.
+    """
+    cells = [c if isinstance(c, str) else '' for c in col.tolist()]
+    # one regex pass over the whole column, then scatter the pairs back to
+    # their rows using the number of pairs per cell
+    pairs = _pair_pat.findall('\n'.join(cells))
+    per_row = np.fromiter((c.count('(') for c in cells), dtype=np.int64, count=len(cells))
+    if per_row.sum() != len(pairs):
+        raise ValueError(f'malformed histogram cell in column {col.name!r}')
+
+    counts = np.zeros((len(cells), len(SCORES)), dtype=np.int64)
+    if pairs:
+        vals = np.array(pairs, dtype=np.int64)
+        if vals[:, 0].max() >= len(SCORES):
+            raise ValueError(f'score out of range 0-{len(SCORES) - 1} in column {col.name!r}')
+        rows = np.repeat(np.arange(len(cells)), per_row)
+        flat = np.bincount(rows * len(SCORES) + vals[:, 0], weights=vals[:, 1],
+                           minlength=counts.size)
+        counts = flat.astype(np.int64).reshape(counts.shape)
+    return counts
+
+def hist_stats(counts):
+    """n, mean, sd per row of a count matrix; score 0 ("N/A") is ignored"""
+    scored = counts[:, 1:].astype('float64')
+    v = SCORES[1:].astype('float64')
+    n = scored.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, scored @ v / n, np.nan)
+        var = np.where(n > 0, scored @ (v ** 2) / n - mean ** 2, np.nan)
+    sd = np.where(var > 0, np.sqrt(np.clip(var, 0, None)), np.where(n > 0, 0.0, np.nan))
+    return n, mean, sd
+
+def stats_from_csv(df):
+    hist_cols = df.columns[7:]
+    for col in hist_cols:
+        n, mean, _ = hist_stats(hist_matrix(df[col]))
+        df[f'{col}_n'] = n
+        df[f'{col}_mean'] = mean
+    return df.drop(columns=hist_cols)
 
-hist_cols = df.columns[7:]
+_bucket_pat = re.compile(r'^(.*)_(\d)$')
 
-def parse_hist_stats(cell):
-    if pd.isna(cell):
-        return 0, np.nan
-    pairs = ast.literal_eval(cell)
-    counts = {v: c for v, c in pairs if v != 0}
-    n = sum(counts.values())
-    mean = sum(v*c for v,c in counts.items())/n if n else np.nan
-    return n, mean
+def stats_from_store(df):
+    """n / mean per question from the integer "{question}_{score}" columns"""
+    questions = {}
+    for col in df.columns:
+        m = _bucket_pat.match(col)
+        if col not in META_COLS and m:
+            questions.setdefault(m.group(1), []).append((int(m.group(2)), col))
 
-for col in hist_cols:
-    df[[f'{col}_n', f'{col}_mean']] = df[col].apply(
-        lambda cell: pd.Series(parse_hist_stats(cell))
-    )
+    out = df[[c for c in META_COLS if c in df.columns]].copy()
+    for q, buckets in questions.items():
+        counts = np.zeros((len(df), len(SCORES)), dtype=np.int64)
+        for v, c in buckets:
+            counts[:, v] = df[c].fillna(0).to_numpy(dtype=np.int64)
+        n, mean, _ = hist_stats(counts)
+        out[f'{q}_n']    = n
+        out[f'{q}_mean'] = mean
+    return out
 
-df = df.drop(columns=hist_cols)
+def store_parts(path):
+    return sorted(Path(path).glob('part-*.parquet'))
+
+def read_store(path, parts=None):
+    parts = store_parts(path) if parts is None else parts
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True) if parts else None
+
+def parse_store(raw):
+    df = stats_from_store(raw)
+    df['year'] = df['year'].astype('float64')
+    df['num_respondents'] = df['num_respondents'].fillna(0).astype('int64')
+    return df
+
+TERM_ORDER = ['Intersession', 'Spring', 'Summer', 'Fall', 'Winter']
+TERM_MONTH = {'Spring': 1, 'Summer': 6, 'Fall': 9}     # as in helper.parse_term
+CATEGORY_COLS = ['course_number', 'course_name', 'instructor', 'term',
+                 'dept', 'term_label']
+_level_pat = re.compile(r'\.(\d{3})$')
+_size_pat = re.compile(r'\b\d+\s+of\s+(\d+)\s+responded', re.I)
+
+def derive(df):
+    """
+    Add the columns the request handlers need, so they only have to filter:
+    cleaned instructor (NaN when missing), dept ("EN.601"), course_level
+    (100, 200, …), size (enrollment from the file name), term_rank,
+    term_date and term_label.
+    String columns are stored as categoricals.
+    """
+    df = df.copy()
+    inst = df['instructor']
+    inst = (inst.where(inst.isna(), inst.astype(str)).str.strip()
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.replace(r'[.,]\s*$', '', regex=True))
+    df['instructor'] = inst.mask(inst == '')      # missing stays missing
+
+    code = df['course_number']
+    df['dept'] = code.str.split('.').str[0:2].str.join('.')
+    df['course_level'] = (code.str.strip().str.extract(_level_pat, expand=False)
+                          .astype('float64') // 100 * 100)
+    df['size'] = df['file'].str.extract(_size_pat, expand=False).astype('float64')
+
+    term = df['term'].str.strip()
+    df['term_rank'] = (term.str.title().map({t: i for i, t in enumerate(TERM_ORDER)})
+                       .fillna(len(TERM_ORDER)).astype('int8'))
+    known = term.notna() & df['year'].notna()
+    year = df['year'].where(known, 1970).astype('int64')
+    month = term.map(TERM_MONTH).where(known, 1).fillna(1).astype('int64')
+    df['term_date'] = pd.to_datetime(
+        pd.DataFrame({'year': year, 'month': month, 'day': 1})).where(known)
+    df['term_label'] = (term + ' ' + year.astype(str)).where(known, 'Unknown')
+
+    for col in CATEGORY_COLS:
+        df[col] = df[col].astype('category')
+    return df
 
 PKL_OUT = os.path.join(
     os.path.dirname(__file__),
@@ -42,7 +160,122 @@ FEATHER_OUT = os.path.join(
     'course_stats_parsed.feather'
 )
 
-df.to_pickle(PKL_OUT)
-df.reset_index(drop=True).to_feather(FEATHER_OUT)
+# incremental mode: one feather file per run, plus what has been consumed
+PARTS_DIR = os.path.join(
+    os.path.dirname(__file__),
+    'app',
+    'data',
+    'course_stats_parsed'
+)
+STATE_PATH = os.path.join(PARTS_DIR, '_state.json')
+HEAD_BYTES = 64 * 1024
+
+def _head_hash(path, n):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(n)).hexdigest()
+
+def csv_increment(state):
+    """
+    Rows appended to the CSV since the byte offset in state; the whole file
+    when it was replaced (its head no longer hashes the same) or shrank.
+    Returns (parsed rows, new state, full rebuild?).
+    """
+    size = os.path.getsize(RAW_PATH)
+    st = state.get('csv')
+    full = not (st and size >= st['offset'] and
+                _head_hash(RAW_PATH, st['head_len']) == st['head'])
+    with open(RAW_PATH, 'rb') as f:
+        header = f.readline()
+        start = len(header) if full else st['offset']
+        f.seek(start)
+        tail = f.read()
+    # never consume a row extract.py is still in the middle of writing
+    tail = tail[:tail.rfind(b'\n') + 1]
+    offset = start + len(tail)
+
+    df = stats_from_csv(pd.read_csv(io.BytesIO(header + tail))) if tail else None
+    head_len = min(offset, HEAD_BYTES)
+    return df, {'csv': {'offset': offset, 'head_len': head_len,
+                        'head': _head_hash(RAW_PATH, head_len)}}, full
+
+def store_increment(state):
+    """
+    Part files added to the Parquet store since the last run (parts are
+    immutable); everything when a consumed part vanished, e.g. after
+    extract.py --reextract replaced the store.
+    """
+    parts = store_parts(STORE_PATH)
+    done = set(state.get('parts', []))
+    full = not done or not done <= {p.name for p in parts}
+    new = parts if full else [p for p in parts if p.name not in done]
+    df = parse_store(read_store(STORE_PATH, new)) if new else None
+    return df, {'parts': sorted(p.name for p in parts)}, full
+
+def incremental():
+    state = {}
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            state = json.load(f)
+
+    if store_parts(STORE_PATH):
+        df, new_state, full = store_increment(state)
+        source = STORE_PATH
+    else:
+        df, new_state, full = csv_increment(state)
+        source = RAW_PATH
+
+    if full and os.path.isdir(PARTS_DIR):
+        shutil.rmtree(PARTS_DIR)
+    os.makedirs(PARTS_DIR, exist_ok=True)
+
+    # the parts the saved state accounts for; one written by a run that died
+    # before saving its state is not among them, and its rows are read again
+    existing = sorted(p.name for p in Path(PARTS_DIR).glob('part-*.feather'))
+    out_parts = [] if full else state.get('out_parts', existing)
+
+    if df is not None and len(df):
+        df = derive(df)
+        # takes the place of such a leftover part, if there is one
+        name = f'part-{len(out_parts):05d}.feather'
+        out = os.path.join(PARTS_DIR, name)
+        df.reset_index(drop=True).to_feather(out + '.tmp')
+        os.replace(out + '.tmp', out)
+        out_parts = out_parts + [name]
+        print(f"{'Rebuilt' if full else 'Appended'} {len(df)} rows from {source} → {out}")
+    else:
+        print(f"No new rows in {source}")
+    for name in set(existing) - set(out_parts):
+        os.remove(os.path.join(PARTS_DIR, name))
+
+    new_state['out_parts'] = out_parts
+    with open(STATE_PATH + '.tmp', 'w') as f:
+        json.dump(new_state, f)
+    os.replace(STATE_PATH + '.tmp', STATE_PATH)
+
+def main():
+    raw = read_store(STORE_PATH) if os.path.isdir(STORE_PATH) else None
+    if raw is not None:
+        df = parse_store(raw)
+        source = STORE_PATH
+    else:
+        df = stats_from_csv(pd.read_csv(RAW_PATH))
+        source = RAW_PATH
+    df = derive(df)
+
+    # write next to the target and rename, so a running dashboard never
+    # reloads a half-written file
+    df.to_pickle(PKL_OUT + '.tmp')
+    os.replace(PKL_OUT + '.tmp', PKL_OUT)
+    df.reset_index(drop=True).to_feather(FEATHER_OUT + '.tmp')
+    os.replace(FEATHER_OUT + '.tmp', FEATHER_OUT)
+    # a full run supersedes any incremental partitions
+    if os.path.isdir(PARTS_DIR):
+        shutil.rmtree(PARTS_DIR)
+
+    print(f"Preprocessed {len(df)} rows from {source} →\n  • Pickle:   {PKL_OUT}\n  • Feather: {FEATHER_OUT}")
 
-print(f"Preprocessed {len(df)} rows →\n  • Pickle:   {PKL_OUT}\n  • Feather: {FEATHER_OUT}")
+if __name__ == '__main__':
+    if '--incremental' in sys.argv[1:]:
+        incremental()
+    else:
+        main()
@@ -1,7 +1,10 @@
 from __future__ import annotations
-import argparse, os, re, sys, time, urllib.parse as up, http.cookiejar as cj
+import argparse, os, re, sys, time, json, hashlib, sqlite3, threading, urllib.parse as up, http.cookiejar as cj
+import importlib.util
 import requests, requests.exceptions as REx
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bs4 import BeautifulSoup, SoupStrainer
 from tqdm import tqdm
 from pathlib import Path
 
@@ -14,10 +17,51 @@ UA     = {"User-Agent":
 BAD    = "wwww.evaluationkit.com"                 # poisoned redirect
 CHUNK  = 20                                       # rows per server chunk
 COOKIE = "cookies.txt"
+JOURNAL = "crawl_journal.sqlite"
+PREFIX_CACHE = "live_prefixes.json"
+MANIFEST = "manifest.jsonl"                       # inside the output folder
+HELPER  = Path(__file__).parent / "course_dashboard" / "app" / "routes" / "helper.py"
+
+# lxml is several times faster than the stdlib parser; fall back when absent
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+_CARD_RE  = re.compile(r"(panel|card)")
+_KEEP     = SoupStrainer(attrs={"class": re.compile(r"(panel|card|sr-pdf)")})
+_MORE_RE  = re.compile(r"""id\s*=\s*["']publicMore["']""")
+_FNAME_RE = re.compile(r"[^\w\- ]")
+
+POOL_SIZE = 4             # minimum keep-alive connections per host, all workers together
 
 N_RETRY = 4               # total attempts = N_RETRY
 BACKOFF = 1.0             # first wait in seconds (doubles each try)
 
+class RateLimiter:
+    """Global requests-per-second cap shared by every worker thread."""
+    def __init__(self, rps: float = 0.0):
+        self.lock = threading.Lock()
+        self.configure(rps)
+
+    def configure(self, rps: float) -> None:
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self.next_at  = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            now   = time.monotonic()
+            slot  = max(now, self.next_at)
+            self.next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def make_adapter(size: int = POOL_SIZE) -> HTTPAdapter:
+    # retries are handled by safe_get_retry, the adapter only sizes the pool
+    return HTTPAdapter(pool_connections=size, pool_maxsize=size, max_retries=0)
+
+RATE    = RateLimiter()   # reconfigured by crawl(); unlimited by default
+ADAPTER = make_adapter()  # one connection pool for every worker session; resized by crawl()
+_tls    = threading.local()
+
 def load_cookies(sess: requests.Session) -> None:
     if not os.path.exists(COOKIE):
         print("[warn] cookies.txt not found – export your Watermark cookies first")
@@ -26,9 +70,27 @@ def load_cookies(sess: requests.Session) -> None:
     for c in jar: sess.cookies.set_cookie(c)
     print(f"[dbg] loaded {len(jar)} cookies")
 
+def make_session() -> requests.Session:
+    sess = requests.Session()
+    sess.headers.update(UA)
+    # urllib3's pool manager is thread-safe: sharing it lets a connection
+    # opened by one worker be reused by any other
+    sess.mount("https://", ADAPTER)
+    sess.mount("http://", ADAPTER)
+    load_cookies(sess)
+    return sess
+
+def thread_session() -> requests.Session:
+    """requests.Session is not thread-safe – keep one per worker thread."""
+    if not hasattr(_tls, "sess"):
+        _tls.sess = make_session()
+    return _tls.sess
+
 def safe_get(sess: requests.Session, url: str, **kw) -> requests.Response:
+    RATE.wait()
     r = sess.get(url, allow_redirects=False, **kw)
     if r.is_redirect and BAD in r.headers.get("Location", ""):
+        RATE.wait()
         r = sess.get(r.headers["Location"].replace(BAD, "www.evaluationkit.com"), **kw)
     r.raise_for_status(); return r
 
@@ -51,15 +113,41 @@ def safe_get_retry(sess: requests.Session, url: str, **kw) -> requests.Response:
     assert exc is not None
     raise exc
 
-def fetch_page(sess, prefix: str, page: int) -> tuple[str, bool]:
-    params = dict(Course=prefix, Instructor="", TermId="", Year="",
+def conditional_get(sess, url: str, params: dict, cache=None,
+                    headers: dict | None = None) -> str:
+    """
+    GET url and return its body.  With a cache (CrawlJournal) the request
+    carries If-None-Match / If-Modified-Since from the last response and a
+    304 is answered from the stored body.
+    """
+    hdrs = dict(headers or {})
+    key  = f"{url}?{up.urlencode(sorted(params.items()))}"
+    hit  = cache.cached_page(key) if cache is not None else None
+    if hit:
+        etag, modified, body = hit
+        if etag:
+            hdrs["If-None-Match"] = etag
+        if modified:
+            hdrs["If-Modified-Since"] = modified
+    r = safe_get_retry(sess, url, params=params, headers=hdrs, timeout=30)
+    if r.status_code == 304 and hit:
+        print(f"[dbg] 304 not modified – reusing cached {key}")
+        return body
+    etag, modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    if cache is not None and (etag or modified):
+        cache.store_page(key, etag, modified, r.text)
+    return r.text
+
+def fetch_page(sess, prefix: str, page: int, year: str = "", term_id: str = "",
+               cache=None) -> tuple[str, bool]:
+    params = dict(Course=prefix, Instructor="", TermId=term_id, Year=year,
                   AreaId="", QuestionKey="", Search="true", page=page)
 
     if page == 1:
-        r   = safe_get_retry(sess, HTML, params=params, timeout=30)
-        html = r.text
-        soup = BeautifulSoup(html, "html.parser")
-        more = bool(soup.select_one("#publicMore"))
+        html = conditional_get(sess, HTML, params, cache)
+        # a substring probe is enough for the more-button; extract_pdfs
+        # does the one real parse of the page
+        more = bool(_MORE_RE.search(html))
         print(f"[dbg] GET Results page=1  → {len(html):,} bytes, more={more}")
         return html, more
 
@@ -67,42 +155,172 @@ def fetch_page(sess, prefix: str, page: int) -> tuple[str, bool]:
         "X-Requested-With": "XMLHttpRequest",
         "Accept": "application/json, text/javascript, */*; q=0.01"
     }
-    r = safe_get_retry(sess, API, params=params, headers=hdrs, timeout=30)
-    data = r.json()
+    data = json.loads(conditional_get(sess, API, params, cache, hdrs))
     html = "".join(data.get("results", []))
     more = bool(data.get("hasMore", False))
     print(f"[dbg] GET PublicReport page={page} → {len(html):,} bytes, more={more}")
     return html, more
 
+def _card_of(a):
+    """nearest panel/card ancestor (what find_parent(class_=…) used to do)"""
+    for p in a.parents:
+        cls = p.get("class") if hasattr(p, "get") else None
+        if cls and any(_CARD_RE.search(c) for c in cls):
+            return p
+    return a.parent if a.parent is not None and a.parent.name != "[document]" else a
+
 def extract_pdfs(html: str) -> list[tuple[str, str]]:
-    soup = BeautifulSoup(html, "html.parser")
+    # only card subtrees and loose sr-pdf links are built into the tree
+    soup = BeautifulSoup(html, PARSER, parse_only=_KEEP)
     out  = []
     for a in soup.select("a.sr-pdf"):
         url   = (f"{BASE}/Reports/SRPdf.aspx?"
                  f"{a['data-id0']},{a['data-id1']},{a['data-id2']},{a['data-id3']}")
-        card  = a.find_parent(class_=re.compile(r"(panel|card)")) or a.parent
-        title = card.get_text(" ", strip=True)
-        fname = re.sub(r"[^\w\- ]", "_", title) + ".pdf"
+        title = _card_of(a).get_text(" ", strip=True)
+        fname = _FNAME_RE.sub("_", title) + ".pdf"
         out.append((url, fname))
     return out
 
-def save_pdf(sess: requests.Session, url: str, dst: str) -> None:
-    if os.path.exists(dst): return
-    r = safe_get_retry(sess, url, stream=False, timeout=30)
+def looks_like_pdf(path: str | os.PathLike) -> bool:
+    """cheap structural check: %PDF- header and an %%EOF marker near the end"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                return False
+            f.seek(max(0, os.path.getsize(path) - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+class PdfStore:
+    """
+    Report-id keyed PDF store for one output folder.
+
+    Every PDF is written to a hidden *.part file and renamed into place only
+    after its size matches Content-Length, so the folder never holds a
+    truncated PDF.  manifest.jsonl (append-only) maps report id → filename,
+    size and sha256; identical content under a second id is not written twice.
+    """
+    def __init__(self, folder: Path):
+        self.folder  = folder
+        self.path    = folder / MANIFEST
+        self.lock    = threading.Lock()
+        self.by_id:   dict[str, dict] = {}
+        self.by_hash: dict[str, str]  = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        ent = json.loads(line)
+                    except ValueError:          # torn last line after a crash
+                        continue
+                    self.by_id[ent["rid"]] = ent
+                    self.by_hash.setdefault(ent["sha256"], ent["rid"])
+
+    def verified(self, rid: str, dst: Path) -> bool:
+        """
+        True when rid needs no download: its manifest entry matches the file
+        on disk, or the file was already consumed (deleted) by extract.py.
+        A pre-manifest file is adopted if it looks like a complete PDF.
+        """
+        ent = self.by_id.get(rid)
+        if ent is not None:
+            f = self.folder / ent["fname"]
+            return not f.exists() or f.stat().st_size == ent["size"]
+        if dst.exists() and looks_like_pdf(dst):
+            h = hashlib.sha256(dst.read_bytes()).hexdigest()
+            self._record(rid, dst.name, dst.stat().st_size, h)
+            return True
+        return False
+
+    def put(self, rid: str, dst: Path, r: requests.Response) -> bool:
+        tmp = self.folder / f".{hashlib.sha1(rid.encode()).hexdigest()}.part"
+        sha, size = hashlib.sha256(), 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in r.iter_content(64 * 1024):
+                    f.write(chunk)
+                    sha.update(chunk)
+                    size += len(chunk)
+            expect = r.headers.get("Content-Length")
+            if expect is not None and int(expect) != size and \
+                    "Content-Encoding" not in r.headers:
+                print(f"[ERROR] truncated download {r.url}: {size:,} of {int(expect):,} bytes")
+                return False
+
+            h = sha.hexdigest()
+            with self.lock:
+                dup = self.by_hash.get(h)
+            if dup is not None and dup != rid:
+                print(f"[dbg] {dst.name}: same content as report {dup} – not stored twice")
+                self._record(rid, self.by_id[dup]["fname"], size, h)
+                return True
+
+            os.replace(tmp, dst)
+            self._record(rid, dst.name, size, h)
+            return True
+        finally:
+            r.close()
+            tmp.unlink(missing_ok=True)
+
+    def _record(self, rid: str, fname: str, size: int, h: str) -> None:
+        ent = {"rid": rid, "fname": fname, "size": size, "sha256": h}
+        with self.lock:
+            self.by_id[rid] = ent
+            self.by_hash.setdefault(h, rid)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(ent) + "\n")
+
+def fetch_report(sess: requests.Session, url: str, links=None) -> requests.Response | None:
+    """
+    Response for the report PDF behind an SRPdf url.  SRPdf answers with a
+    small HTML page that JavaScript-redirects to the real file; the resolved
+    target is remembered per report id (links = CrawlJournal) so later
+    downloads go straight to it, falling back to the hop if it went stale.
+    """
+    rid    = report_id(url)
+    target = links.redirect_for(rid) if links is not None else None
+    if target:
+        try:
+            r = safe_get_retry(sess, target, stream=True, timeout=60)
+            if "application/pdf" in r.headers.get("Content-Type", ""):
+                return r
+            r.close()                  # unread stream: hand the connection back
+        except REx.RequestException:
+            pass
+        print(f"[dbg] cached redirect for {rid} is stale – resolving again")
+
+    r = safe_get_retry(sess, url, stream=True, timeout=30)
     if "text/html" in r.headers.get("Content-Type", ""):
         m = re.search(r"document\.location\.href\s*=\s*['\"](.+?)['\"]", r.text)
         if not m:
             print(f"[ERROR] couldn’t find redirect inside {url}")
-            return
-        r = safe_get_retry(sess, up.urljoin(r.url, m.group(1)), stream=True, timeout=60)
+            return None
+        target = up.urljoin(r.url, m.group(1))
+        r = safe_get_retry(sess, target, stream=True, timeout=60)
+        if links is not None and "application/pdf" in r.headers.get("Content-Type", ""):
+            links.set_redirect(rid, target)
+    return r
 
+def save_pdf(sess: requests.Session, url: str, dst: str | os.PathLike,
+             store: PdfStore | None = None, links=None) -> bool:
+    dst   = Path(dst)
+    store = store or PdfStore(dst.parent)
+    rid   = report_id(url)
+    if store.verified(rid, dst):
+        return True
+    if dst.exists():
+        print(f"[warn] {dst.name} is incomplete – fetching again")
+
+    r = fetch_report(sess, url, links)
+    if r is None:
+        return False
     if "application/pdf" not in r.headers.get("Content-Type", ""):
         print(f"[ERROR] expected PDF, got {r.headers.get('Content-Type')} from {r.url}")
-        return
+        r.close()
+        return False
 
-    with open(dst, "wb") as f:
-        for chunk in r.iter_content(8192):
-            f.write(chunk)
+    return store.put(rid, dst, r)
 
 def prefixes():
     for stem in ("AS.", "EN."):
@@ -132,55 +350,318 @@ def make_prefix_iter(user_prefix: str | None):
     else:
         return iter([f"{stem}.{number}"])
 
-def crawl(out_dir: str, delay: float, live: bool, prefix_filter: str | None):
+def dept_code_prefixes() -> list[str]:
+    """AS./EN. prefixes for every department the dashboard knows about"""
+    try:
+        spec = importlib.util.spec_from_file_location("_dept_helper", HELPER)
+        mod  = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+    except (OSError, ImportError) as er:
+        print(f"[warn] couldn’t load DEPT_CODES from {HELPER} – {er}")
+        return []
+    # Krieger (AS) codes sit below 500, Whiting (EN) codes from 500 up
+    return sorted(f"{'EN' if int(code) >= 500 else 'AS'}.{code}"
+                  for code in mod.DEPT_CODES)
+
+def load_live_prefixes(path: str, ttl_days: float) -> list[str] | None:
+    """cached non-empty prefixes, or None when missing / older than ttl_days"""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    age = (time.time() - cache.get("updated", 0)) / 86400
+    if age > ttl_days:
+        print(f"[dbg] {path} is {age:.1f} days old – rediscovering prefixes")
+        return None
+    return cache.get("prefixes", [])
+
+def save_live_prefixes(path: str, prefs: list[str]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"updated": time.time(), "prefixes": sorted(prefs)}, f, indent=1)
+    os.replace(tmp, path)
+    print(f"[dbg] cached {len(prefs)} live prefixes → {path}")
+
+def discovered_prefix_iter(user_prefix: str | None, cache: str, ttl_days: float):
+    """
+    Live prefixes from the discovery cache plus every DEPT_CODES department,
+    restricted to --prefix.  Returns (iterator, sweep?) – sweep is True when
+    the cache is stale and the full prefix range has to be walked to rebuild it.
+    """
+    live = load_live_prefixes(cache, ttl_days)
+    if live is None:
+        return make_prefix_iter(user_prefix), True
+    wanted = set(make_prefix_iter(user_prefix))
+    prefs  = sorted((set(live) | set(dept_code_prefixes())) & wanted)
+    print(f"[dbg] discovery: {len(prefs)} of {len(wanted)} prefixes are live")
+    return iter(prefs), False
+
+class CrawlJournal:
+    """
+    On-disk crawl checkpoint (SQLite, WAL mode).
+
+    prefixes : last result page fetched per prefix and whether it is exhausted
+    reports  : every report id seen, with its download url/filename and
+               whether the PDF has been saved
+
+    A page and the report ids it yielded are committed in one transaction,
+    so after a crash every id is either queued for download or its page
+    will be fetched again.
+    """
+    def __init__(self, path: str | os.PathLike):
+        self.lock = threading.Lock()
+        self.db   = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS prefixes (
+                prefix    TEXT PRIMARY KEY,
+                last_page INTEGER NOT NULL,
+                done      INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                key           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                body          TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS redirects (
+                rid    TEXT PRIMARY KEY,
+                target TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reports (
+                rid    TEXT PRIMARY KEY,
+                prefix TEXT NOT NULL,
+                url    TEXT NOT NULL,
+                fname  TEXT NOT NULL,
+                saved  INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        self.db.commit()
+
+    def report_ids(self) -> set[str]:
+        with self.lock:
+            return {rid for (rid,) in self.db.execute("SELECT rid FROM reports")}
+
+    def unsaved(self) -> list[tuple[str, str]]:
+        with self.lock:
+            return self.db.execute(
+                "SELECT url, fname FROM reports WHERE saved = 0").fetchall()
+
+    def position(self, prefix: str) -> tuple[int, bool]:
+        """(last page fetched – 0 if never, prefix exhausted?)"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT last_page, done FROM prefixes WHERE prefix = ?",
+                (prefix,)).fetchone()
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def reset_positions(self) -> None:
+        """forget every prefix position, so the next crawl walks them all again"""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM prefixes")
+
+    def record_page(self, prefix: str, page: int | None,
+                    rows: list[tuple[str, str]], done: bool) -> None:
+        """page=None stores the reports without moving the prefix position"""
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO reports (rid, prefix, url, fname) "
+                "VALUES (?, ?, ?, ?)",
+                [(report_id(url), prefix, url, fname) for url, fname in rows])
+            if page is None:
+                return
+            self.db.execute(
+                "INSERT INTO prefixes (prefix, last_page, done) VALUES (?, ?, ?) "
+                "ON CONFLICT(prefix) DO UPDATE SET "
+                "last_page = excluded.last_page, done = excluded.done",
+                (prefix, page, int(done)))
+
+    def cached_page(self, key: str) -> tuple[str | None, str | None, str] | None:
+        with self.lock:
+            return self.db.execute(
+                "SELECT etag, last_modified, body FROM pages WHERE key = ?",
+                (key,)).fetchone()
+
+    def store_page(self, key: str, etag: str | None, modified: str | None,
+                   body: str) -> None:
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                            (key, etag, modified, body))
+
+    def redirect_for(self, rid: str) -> str | None:
+        with self.lock:
+            row = self.db.execute("SELECT target FROM redirects WHERE rid = ?",
+                                  (rid,)).fetchone()
+        return row[0] if row else None
+
+    def set_redirect(self, rid: str, target: str) -> None:
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO redirects VALUES (?, ?)",
+                            (rid, target))
+
+    def live_prefixes(self) -> list[str]:
+        """prefixes that produced at least one report"""
+        with self.lock:
+            return [p for (p,) in self.db.execute(
+                "SELECT DISTINCT prefix FROM reports ORDER BY prefix")]
+
+    def mark_saved(self, url: str) -> None:
+        with self.lock, self.db:
+            self.db.execute("UPDATE reports SET saved = 1 WHERE rid = ?",
+                            (report_id(url),))
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+def report_id(url: str) -> str:
+    """data-id0..3 joined by commas – the query string of the SRPdf url"""
+    return url.split("?", 1)[1]
+
+def next_page(page: int) -> int:
+    # the HTML view serves page 1, the JSON api continues at page 3
+    return 3 if page <= 1 else page + 1
+
+class SeenSet:
+    """Report ids already queued, shared across prefix workers."""
+    def __init__(self, ids: set[str] | None = None):
+        self.ids  = ids or set()
+        self.lock = threading.Lock()
+
+    def claim(self, rid: str) -> bool:
+        with self.lock:
+            if rid in self.ids:
+                return False
+            self.ids.add(rid)
+            return True
+
+def crawl_prefix(pref: str, delay: float, seen: SeenSet, download,
+                 journal: CrawlJournal, year: str = "",
+                 incremental: bool = False) -> None:
+    """
+    Page through one prefix (optionally restricted to one Year).
+
+    Full crawls resume from the journal position.  Incremental crawls always
+    start at page 1 – results come newest first – and stop at the first page
+    that holds nothing but already-known report ids; they never move the
+    full-crawl position.
+    """
+    tag = f"{pref} {year}".strip()
+    last, done = (0, False) if incremental else journal.position(pref)
+    if done:
+        print(f"[dbg] {tag}: already complete – skipped")
+        return
+
+    sess = thread_session()
+    page = next_page(last) if last else 1
+    while True:
+        html, more = fetch_page(sess, pref, page, year=year, cache=journal)
+        rows = extract_pdfs(html)
+        print(f"[dbg] {tag} page{page}: {len(rows)} links")
+
+        fresh = [(url, fname) for url, fname in rows
+                 if seen.claim(report_id(url))]
+        finished = not more or (page > 1 and len(rows) < CHUNK)
+        journal.record_page(pref, None if incremental else page, fresh, finished)
+
+        for url, fname in fresh:
+            download(url, fname)
+        print(f"[dbg] {tag}: +{len(fresh)} new from page{page}")
+
+        if finished:
+            break
+        if incremental and rows and not fresh:
+            print(f"[dbg] {tag}: reached known reports – stopping")
+            break
+        if page > 1:
+            time.sleep(delay)
+        page = next_page(page)
+
+def crawl(out_dir: str, delay: float, live: bool, prefix_filter: str | None,
+          workers: int = 1, rps: float | None = None, journal_path: str = JOURNAL,
+          fresh: bool = False, incremental: bool = False, since: int | None = None,
+          discover: bool = False, discover_ttl: float = 30.0,
+          prefix_cache: str = PREFIX_CACHE, pool: int | None = None):
+    global ADAPTER
     out_path = Path(out_dir.replace("\\", os.sep)).expanduser().resolve()
     out_path.mkdir(parents=True, exist_ok=True)
-    sess = requests.Session()
-    sess.headers.update(UA)
-    load_cookies(sess)
+    if rps is None:
+        # one request per --delay overall, as a single-threaded crawl makes
+        rps = 1.0 / delay if workers > 1 and delay > 0 else 0.0
+    RATE.configure(rps)
+    # prefix and download threads may all hold a connection at once
+    ADAPTER = make_adapter(pool or max(POOL_SIZE, 2 * workers))
 
-    seen: set[str] = set()
-    for pref in tqdm(make_prefix_iter(prefix_filter), desc="Prefixes"):
-        html, more = fetch_page(sess, pref, 1)
-        rows = extract_pdfs(html)
-        print(f"[dbg] {pref} page1: {len(rows)} links")
-
-        new = 0
-        for url, fname in rows:
-            rid = url.split("?", 1)[1]
-            if rid in seen:
-                continue
-            seen.add(rid)
-            new += 1
-            if live:
-                print(f"Downloading → {fname}")
-                save_pdf(sess, url, out_path / fname)
-        print(f"[dbg] {pref}: +{new} new from page1")
-
-        api_page = 3
-        while more:
-            html, more = fetch_page(sess, pref, api_page)
-            rows = extract_pdfs(html)
-            print(f"[dbg] {pref} page{api_page}: {len(rows)} links")
-            if not rows:
-                break
+    journal = CrawlJournal(journal_path)
+    if fresh:
+        # known reports stay known, so only new ones are downloaded
+        journal.reset_positions()
+    seen    = SeenSet(journal.report_ids())
+    backlog = journal.unsaved() if live else []
+    print(f"[dbg] journal {journal_path}: {len(seen.ids)} known reports, "
+          f"{len(backlog)} waiting for download")
 
-            new = 0
-            for url, fname in rows:
-                rid = url.split("?", 1)[1]
-                if rid in seen:
-                    continue
-                seen.add(rid)
-                new += 1
+    # --since implies incremental and narrows every query to recent years
+    incremental = incremental or since is not None
+    years = ([str(y) for y in range(since, time.localtime().tm_year + 1)]
+             if since is not None else [""])
+    sweep = False
+    if discover:
+        prefs, sweep = discovered_prefix_iter(prefix_filter, prefix_cache, discover_ttl)
+        # only an unrestricted walk sees every prefix, so only it may rewrite the cache
+        sweep = sweep and prefix_filter is None
+        # the sweep has to look at every prefix again, including those an
+        # earlier full crawl finished, so it ignores the journal positions
+        incremental = incremental or sweep
+    else:
+        prefs = make_prefix_iter(prefix_filter)
+    jobs  = [(pref, year) for pref in prefs for year in years]
+
+    store = PdfStore(out_path)
+
+    def _save(url, fname):
+        print(f"Downloading → {fname}")
+        if save_pdf(thread_session(), url, out_path / fname, store, journal):
+            journal.mark_saved(url)
+
+    try:
+        if workers <= 1:
+            def download(url, fname):
                 if live:
-                    print(f"Downloading → {fname}")
-                    save_pdf(sess, url, out_path / fname)
-            print(f"[dbg] {pref}: +{new} new so far")
+                    _save(url, fname)
 
-            if len(rows) < CHUNK:
-                break
-            api_page += 1
-            time.sleep(delay)
+            for url, fname in backlog:
+                _save(url, fname)
+            for pref, year in tqdm(jobs, desc="Prefixes"):
+                crawl_prefix(pref, delay, seen, download, journal, year, incremental)
+        else:
+            # prefixes and PDF downloads each get their own bounded pool so a
+            # prefix with hundreds of reports cannot starve the page fetchers
+            with ThreadPoolExecutor(workers, thread_name_prefix="pdf") as dl_pool, \
+                 ThreadPoolExecutor(workers, thread_name_prefix="prefix") as pref_pool:
+                pending = [dl_pool.submit(_save, url, fname) for url, fname in backlog]
+                pending_lock = threading.Lock()
+
+                def download(url, fname):
+                    if live:
+                        fut = dl_pool.submit(_save, url, fname)
+                        with pending_lock:
+                            pending.append(fut)
+
+                futs = [pref_pool.submit(crawl_prefix, pref, delay, seen, download,
+                                         journal, year, incremental)
+                        for pref, year in jobs]
+                for fut in tqdm(as_completed(futs), total=len(futs), desc="Prefixes"):
+                    fut.result()
+
+                for fut in as_completed(pending):
+                    fut.result()
+
+        if sweep:
+            save_live_prefixes(prefix_cache, journal.live_prefixes())
+    finally:
+        journal.close()
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
@@ -197,7 +678,29 @@ if __name__ == "__main__":
 
     ap.add_argument("--prefix",
                     help="AS | EN | AS.xxx | EN.xxx  (restrict crawl)")
+    ap.add_argument("-w", "--workers", type=int, default=1,
+                    help="parallel prefix / PDF download threads (default: %(default)s)")
+    ap.add_argument("--rps", type=float,
+                    help="global cap on HTTP requests per second, 0 = unlimited "
+                         "(default: 1/DELAY with several workers, else unlimited)")
+    ap.add_argument("--journal", default=JOURNAL,
+                    help="crawl checkpoint database (default: %(default)s)")
+    ap.add_argument("--fresh", action="store_true",
+                    help="walk every prefix again from page 1 (known reports are kept)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="stop paging a prefix once a page holds only known reports")
+    ap.add_argument("--since", type=int, metavar="YEAR",
+                    help="incremental crawl restricted to YEAR..this year")
+    ap.add_argument("--discover", action="store_true",
+                    help=f"only crawl prefixes known to have reports ({PREFIX_CACHE})")
+    ap.add_argument("--discover-ttl", type=float, default=30.0, metavar="DAYS",
+                    help="rebuild the live-prefix cache after DAYS (default: %(default)s)")
+    ap.add_argument("--pool", type=int,
+                    help="keep-alive connections per host, shared by all workers "
+                         f"(default: 2 × workers, at least {POOL_SIZE})")
     args = ap.parse_args()
 
     out_dir = args.abs_out if args.abs_out else args.out
-    crawl(out_dir, args.delay, args.live, args.prefix)
+    crawl(out_dir, args.delay, args.live, args.prefix, args.workers, args.rps,
+          args.journal, args.fresh, args.incremental, args.since,
+          args.discover, args.discover_ttl, PREFIX_CACHE, args.pool)
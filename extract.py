@@ -1,13 +1,45 @@
 import fitz  # PyMuPDF
 import re
+import os
+import sys
+import select
+import struct
+import argparse
+import ctypes, ctypes.util
+import json
+import csv as csv_mod
+import zlib
+import shutil
+import sqlite3
+import hashlib
+import functools
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import time
 
+_INSTRUCTOR = re.compile(r"\n([^\n]+?)\s*Instructor")
+_COURSE     = re.compile(r"Course:\s*([A-Z0-9\.]+)\s*:\s*(.+?)\n")
+_TERM       = re.compile(r"(\d{4})\s+(Spring|Fall|Summer|Intersession)")
+_QUESTION   = re.compile(r"\n\d+\s*-\s*")
+_RESPONSE   = re.compile(r"\((\d)\)\s+(\d+)\s+\d{1,3}\.\d{2}%")
+_RESPONDED  = re.compile(r"(\d+)/\d+\s+\(\d{1,3}%\)")
+
+# questions every report carries; once all of them are parsed the remaining
+# pages (free-text comments) are not read at all
+KNOWN_QUESTIONS = frozenset({
+    "The instructor's teaching effectiveness is:",
+    "The intellectual challenge of this course is:",
+    "The teaching assistant for this course is:",
+    "Feedback on my work for this course is useful:",
+    "Compared to other Hopkins courses at this level, the workload for this course is:",
+})
+
 def extract_metadata(text):
-    instructor_match = re.search(r"\n([^\n]+?)\s*Instructor", text)
-    course_match = re.search(r"Course:\s*([A-Z0-9\.]+)\s*:\s*(.+?)\n", text)
-    term_match = re.search(r"(\d{4})\s+(Spring|Fall|Summer|Intersession)", text)
+    instructor_match = _INSTRUCTOR.search(text)
+    course_match = _COURSE.search(text)
+    term_match = _TERM.search(text)
 
     if course_match:
         course_number = course_match.group(1).strip()
@@ -30,9 +62,9 @@ def extract_question_data(block):
     lines = block.strip().splitlines()
     question_title = lines[0]
 
-    responses = re.findall(r'\((\d)\)\s+(\d+)\s+\d{1,3}\.\d{2}%', block)
+    responses = _RESPONSE.findall(block)
 
-    respondent_match = re.search(r"(\d+)/\d+\s+\(\d{1,3}%\)", block)
+    respondent_match = _RESPONDED.search(block)
     num_respondents = int(respondent_match.group(1)) if respondent_match else 0
 
     return {
@@ -45,35 +77,113 @@ def extract_respondents_from_filename(fname):
     m = re.search(r'(\d+)[_\s]+of[_\s]+\d+[_\s]+responded', fname, re.IGNORECASE)
     return int(m.group(1)) if m else 0
 
-def process_pdf(file_path):
-    doc = fitz.open(file_path)
-    all_text = "".join(page.get_text() for page in doc)
+def page_text(page):
+    """text of a page's text blocks (image blocks skipped), in layout order"""
+    return "".join(b[4] for b in page.get_text("blocks") if b[6] == 0)
+
+def _texts(doc, keep=None):
+    for page in doc:
+        text = page_text(page)
+        if keep is not None:
+            keep.append(text)
+        yield text
+
+def process_pdf(file_path, known=KNOWN_QUESTIONS):
+    with fitz.open(file_path) as doc:
+        return parse_pages(_texts(doc), Path(file_path).name, known)
 
-    metadata = extract_metadata(all_text)
-    question_blocks = re.split(r"\n\d+\s*-\s*", all_text)[1:]
+def extract_with_text(file_path, known=KNOWN_QUESTIONS, all_pages=False):
+    """
+    process_pdf that also returns the PDF's sha256 and the text of the pages
+    it read (every page with all_pages=True) for the extraction cache.
+    """
+    data = Path(file_path).read_bytes()
+    texts = []
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        row = parse_pages(_texts(doc, texts), Path(file_path).name, known)
+        if all_pages:
+            texts.extend(page_text(page) for page in doc.pages(len(texts)))
+    return row, hashlib.sha256(data).hexdigest(), texts
 
+def parse_pages(pages, file_name, known=KNOWN_QUESTIONS):
+    """
+    Parse one report from an iterable of page texts.  Metadata is read from
+    the pages up to the first question header only, question blocks are
+    split as they stream past – a block running over a page break is
+    carried to the next page – and reading stops as soon as every question
+    in `known` is parsed (known=None reads all pages).
+    """
+    meta_text = ""
+    metadata = extract_metadata(meta_text)
     questions_dict = {}
-    respondent_counts = []
+    carry = ""                 # text from the last question header onwards
+    started = False            # seen the first question header yet?
 
-    for block in question_blocks:
+    def add_block(block):
         q = extract_question_data(block)
-        if not q["responses"]:
-            continue
+        if q["responses"] and q["question_title"] not in questions_dict:
+            questions_dict[q["question_title"]] = q["responses"]
 
-        if q["question_title"] not in questions_dict:
+    def last_known_done(carry):
+        """
+        All known questions parsed?  The final one is still in `carry`
+        (nothing follows it but comments), so accept it once its response
+        table is as long as the other questions' tables.
+        """
+        missing = known - questions_dict.keys()
+        if not missing:
+            return True
+        if len(missing) > 1 or not questions_dict:
+            return False
+        blocks = _QUESTION.split(carry)[1:]
+        q = extract_question_data(blocks[0]) if len(blocks) == 1 else None
+        width = max(len(r) for r in questions_dict.values())
+        if q and q["question_title"] in missing and len(q["responses"]) >= width:
             questions_dict[q["question_title"]] = q["responses"]
+            return True
+        return False
+
+    for text in pages:
+        if not started and not all(metadata.values()):
+            meta_text += text
+            metadata = extract_metadata(meta_text)
+
+        buf = carry + text
+        heads = list(_QUESTION.finditer(buf))
+        if not heads:
+            # no question starts here: either the continuation of the
+            # carried block, or still preamble – dropped except for its
+            # last character, the newline a header on the next page needs
+            carry = buf if started else buf[-1:]
+            continue
+        started = True
+
+        # everything before the last header is final; the last block may
+        # continue on the next page
+        last = heads[-1].start()
+        for block in _QUESTION.split(buf[:last])[1:]:
+            add_block(block)
+        carry = buf[last:]
+
+        if known and last_known_done(carry):
+            carry = ""
+            break
+
+    if carry:
+        for block in _QUESTION.split(carry)[1:]:
+            add_block(block)
 
     row = {
-        "file": Path(file_path).name,
+        "file": file_name,
         "course_number": metadata["course_number"],
         "course_name": metadata["course_name"],
         "instructor": metadata["instructor"],
         "year": metadata["year"],
         "term": metadata["term"],
-        "num_respondents": max(respondent_counts) if respondent_counts else 0
+        "num_respondents": 0
     }
     row.update(questions_dict)
-    n = extract_respondents_from_filename(file_path.name)
+    n = extract_respondents_from_filename(file_name)
     row["num_respondents"] = n if n is not None else 0
     return row
 
@@ -97,31 +207,469 @@ def append_row_to_csv(row, csv_path="all_course_stats.csv"):
     write_header = not Path(csv_path).exists()
     df.to_csv(csv_path, mode="a", index=False, header=write_header)
 
-def watch_and_process(folder_path="pdfs", poll_interval=5):
-    folder = Path(folder_path)
-    folder.mkdir(parents=True, exist_ok=True)
-    processed = set()
+META_COLS = ["file", "course_number", "course_name", "instructor",
+             "year", "term", "num_respondents"]
+STORE_PATH = "all_course_stats"
+
+def flatten_row(row):
+    """
+    Metadata plus one integer column per (question, score) bucket, named
+    f"{question}_{score}" – e.g. "... is:_5" holds the count of 5s.
+    """
+    flat = {m: row.get(m) for m in META_COLS}
+    for key, val in row.items():
+        if key in META_COLS or not isinstance(val, list):
+            continue
+        for score, count in val:
+            flat[f"{key}_{score}"] = count
+    return flat
+
+class BatchWriter:
+    """
+    Buffers extracted rows and writes them to a Parquet dataset folder, one
+    part file per flush (every max_rows rows or max_wait seconds).  Parts are
+    written under a hidden temp name and renamed, so readers never see a
+    partial file.  Each part carries its own schema; a question first seen
+    later simply adds columns, which readers union when concatenating parts.
+    """
+    def __init__(self, path=STORE_PATH, max_rows=500, max_wait=30.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.rows = []
+        self.first_at = None
+        self.seq = 0
+
+    def add(self, row):
+        if not self.rows:
+            self.first_at = time.monotonic()
+        self.rows.append(flatten_row(row))
+
+    def due(self):
+        return bool(self.rows) and (
+            len(self.rows) >= self.max_rows or
+            time.monotonic() - self.first_at >= self.max_wait)
+
+    def flush(self):
+        """write buffered rows; returns how many were written"""
+        if not self.rows:
+            return 0
+        n = self.write(pd.DataFrame(self.rows))
+        self.rows = []
+        return n
+
+    def write(self, df):
+        """write a frame of flattened rows as one part file"""
+        df = df.copy()
+        df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int16")
+        df["num_respondents"] = df["num_respondents"].astype("Int32")
+        buckets = [c for c in df.columns if c not in META_COLS]
+        df[buckets] = df[buckets].astype("Int32")
+
+        self.seq += 1
+        name = f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.seq:04d}.parquet"
+        tmp = self.path / f".{name}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, self.path / name)
+
+        print(f"Wrote {len(df)} row(s) → {self.path / name}")
+        return len(df)
+
+MAX_CRASHES = 3
+
+def run_batch(pdf_files, pool=None, fn=process_pdf):
+    """
+    Yield (pdf_file, fn(pdf_file), error) for pdf_files in the given order.
+    With a pool the parsing runs in worker processes, but results are still
+    handed back in input order so the single writer produces deterministic
+    output.
+    """
+    if pool is None:
+        for pdf_file in pdf_files:
+            try:
+                yield pdf_file, fn(pdf_file), None
+            except Exception as e:
+                yield pdf_file, None, e
+        return
+
+    futures = [(pdf_file, pool.submit(fn, pdf_file)) for pdf_file in pdf_files]
+    for pdf_file, fut in futures:
+        try:
+            yield pdf_file, fut.result(), None
+        except Exception as e:
+            yield pdf_file, None, e
+
+CACHE_PATH = "extract_cache.sqlite"
+
+class TextCache:
+    """
+    Page text of every extracted PDF, keyed by the PDF's sha256 and stored
+    as zlib-compressed JSON in SQLite, so parsing changes can be replayed
+    with reextract() after the PDFs themselves are gone.
+    """
+    def __init__(self, path=CACHE_PATH, readonly=False):
+        if readonly:
+            # never create a cache just to read it
+            if not Path(path).is_file():
+                raise FileNotFoundError(f"no extraction cache at `{path}`")
+            self.db = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+            return
+        self.db = sqlite3.connect(str(path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                sha256 TEXT PRIMARY KEY,
+                file   TEXT NOT NULL,
+                pages  BLOB NOT NULL
+            )""")
+        self.db.commit()
+
+    def put(self, sha, file_name, texts):
+        blob = zlib.compress(json.dumps(texts).encode(), 6)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)",
+                            (sha, file_name, blob))
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def files(self):
+        return {name for (name,) in self.db.execute("SELECT file FROM docs")}
+
+    def __iter__(self):
+        """(sha256, file name, page texts) in file-name order"""
+        for sha, name, blob in self.db.execute(
+                "SELECT sha256, file, pages FROM docs ORDER BY file"):
+            yield sha, name, json.loads(zlib.decompress(blob))
+
+    def close(self):
+        self.db.close()
+
+def keep_uncovered(target, tmp, covered, writer=None):
+    """
+    Copy the rows of the existing output whose PDF is not in the cache
+    (`covered`) into the new output; returns how many were kept.
+    """
+    if writer is not None:
+        parts = sorted(target.glob("part-*.parquet")) if target.is_dir() else []
+        kept = [df[~df["file"].isin(covered)] for df in map(pd.read_parquet, parts)]
+        kept = [df for df in kept if len(df)]
+        return writer.write(pd.concat(kept, ignore_index=True)) if kept else 0
+
+    if not target.is_file():
+        return 0
+    n = 0
+    with open(target, newline="") as src, open(tmp, "w", newline="") as dst:
+        rows = csv_mod.reader(src)
+        out  = csv_mod.writer(dst, lineterminator=os.linesep)   # as pandas writes it
+        header = next(rows, None)
+        if header is None:
+            return 0
+        out.writerow(header)
+        i = header.index("file")
+        for rec in rows:
+            if rec and rec[i] not in covered:
+                out.writerow(rec)
+                n += 1
+    return n
+
+def reextract(cache_path=CACHE_PATH, out=STORE_PATH, csv=False, known=KNOWN_QUESTIONS):
+    """
+    Rebuild the output from cached page text with the current parsing code –
+    no PDFs, no network.  Rows of PDFs the cache does not hold (extracted
+    before it existed, or with --no-cache) are carried over unchanged.  The
+    new output replaces the old one only once it is complete.
+    """
+    cache = TextCache(cache_path, readonly=True)
+    try:
+        covered = cache.files()
+        if not covered:
+            raise ValueError(f"extraction cache `{cache_path}` is empty")
+        print(f"Re-extracting {len(covered)} cached PDF(s) from `{cache_path}`")
+        target = Path("all_course_stats.csv" if csv else out)
+        tmp = target.with_name(target.name + ".new")
+        if tmp.is_dir():
+            shutil.rmtree(tmp)
+        tmp.unlink(missing_ok=True)
+
+        writer = None if csv else BatchWriter(tmp, max_rows=5000, max_wait=float("inf"))
+        kept = keep_uncovered(target, tmp, covered, writer)
+        n = 0
+        for _, name, texts in cache:
+            try:
+                row = parse_pages(texts, name, known)
+            except Exception as e:
+                print(f"Error re-extracting `{name}`: {e}")
+                continue
+            if writer is None:
+                append_row_to_csv(row, tmp)
+            else:
+                writer.add(row)
+                if writer.due():
+                    writer.flush()
+            n += 1
+        if writer is not None:
+            writer.flush()
+    finally:
+        cache.close()
+
+    if not n or not tmp.exists():
+        if tmp.is_dir():
+            shutil.rmtree(tmp)
+        tmp.unlink(missing_ok=True)
+        print(f"Nothing re-extracted – `{target}` left unchanged")
+        return
+    if target.is_dir():
+        shutil.rmtree(target)
+    target.unlink(missing_ok=True)
+    os.replace(tmp, target)
+    print(f"Re-extracted {n} row(s), kept {kept} uncached row(s) → {target}")
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_Q_OVERFLOW  = 0x00004000
+IN_NONBLOCK    = os.O_NONBLOCK
+IN_CLOEXEC     = 0o2000000
+_EVENT         = struct.Struct("iIII")   # wd, mask, cookie, len
+SETTLE         = 1.0                     # polling: ignore files younger than this
+
+class Inotify:
+    """
+    Minimal ctypes inotify watch on one folder for finished files: a PDF
+    shows up either when its writer closes it (IN_CLOSE_WRITE) or when it is
+    renamed into place from a temp name (IN_MOVED_TO), never mid-write.
+    """
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder),
+                                    IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed on {folder}")
+
+    def read(self, timeout):
+        """
+        names finished since the last call; empty after timeout seconds,
+        None when the kernel queue overflowed and events were lost
+        """
+        names = set()
+        overflow = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            off = 0
+            while off < len(buf):
+                _, mask, _, length = _EVENT.unpack_from(buf, off)
+                off += _EVENT.size
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                else:
+                    names.add(os.fsdecode(buf[off:off + length].rstrip(b"\0")))
+                off += length
+            # let a burst of arrivals settle into one batch
+            ready, _, _ = select.select([self.fd], [], [], 0.05)
+        return None if overflow else names
+
+    def close(self):
+        os.close(self.fd)
+
+def watch_folder(folder, poll_interval=5, retry=None, skip=None):
+    """
+    Yield sorted batches of finished PDFs in folder.  Uses inotify on Linux
+    and falls back to scanning every poll_interval seconds elsewhere.
+
+    retry: PDFs the caller wants offered again after the next poll_interval
+    skip : file names never to offer; pruned as those files disappear
+    """
+    retry = retry if retry is not None else set()
+    skip  = skip  if skip  is not None else set()
+    try:
+        ino = Inotify(folder) if sys.platform.startswith("linux") else None
+    except OSError as e:
+        print(f"inotify unavailable ({e}), polling every {poll_interval}s")
+        ino = None
+
+    def present():
+        now   = time.time()
+        files = list(folder.glob("*.pdf"))
+        skip.intersection_update(f.name for f in files)
+        # without close/rename events, a recently touched file may still be written
+        return [f for f in files if f.name not in skip
+                and (ino or now - f.stat().st_mtime >= SETTLE)]
 
-    print(f"Watching `{folder}` for new PDFs")
     try:
+        if ino is None:
+            while True:
+                retry.clear()
+                yield sorted(present())
+                time.sleep(poll_interval)
+
+        yield sorted(present())          # whatever arrived before we started
         while True:
-            for pdf_file in folder.glob("*.pdf"):
-                if pdf_file.name in processed:
-                    continue
+            names = ino.read(poll_interval)
+            if names is None:
+                print("inotify queue overflowed, rescanning the folder")
+                retry.clear()
+                yield sorted(present())
+                continue
+            batch = {folder / n for n in names
+                     if n.endswith(".pdf") and n not in skip}
+            if not names and retry:
+                batch |= retry
+                retry.clear()
+                skip.intersection_update(f.name for f in folder.glob("*.pdf"))
+            # empty batches on timeout let the caller flush timed buffers
+            yield sorted(f for f in batch if f.exists())
+    finally:
+        if ino is not None:
+            ino.close()
 
-                print(f"New file: {pdf_file.name}")
-                try:
-                    row = process_pdf(pdf_file)
+def watch_and_process(folder_path="pdfs", poll_interval=5, workers=1,
+                      out=STORE_PATH, csv=False, batch_rows=500, batch_wait=30.0,
+                      cache_path=CACHE_PATH, cache_all_pages=False):
+    folder = Path(folder_path)
+    folder.mkdir(parents=True, exist_ok=True)
+    # processed PDFs are deleted, so only failures need remembering and both
+    # sets shrink again as those files are fixed or removed
+    retry, skipped = set(), set()
+    crashes = {}
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    writer = None if csv else BatchWriter(out, batch_rows, batch_wait)
+    cache = TextCache(cache_path) if cache_path else None
+    fn = (functools.partial(extract_with_text, all_pages=cache_all_pages)
+          if cache is not None else process_pdf)
+    buffered = []           # PDFs whose rows wait in the writer's buffer
+
+    def commit():
+        # a PDF is only deleted once its row is safely on disk
+        if writer is not None and writer.flush():
+            for pdf_file in buffered:
+                pdf_file.unlink(missing_ok=True)
+                skipped.discard(pdf_file.name)
+                print(f"Processed & deleted `{pdf_file.name}`")
+            buffered.clear()
+
+    def handle(pdf_file, row, err):
+        if err is None:
+            try:
+                crashes.pop(pdf_file.name, None)
+                if cache is not None:
+                    row, sha, texts = row
+                    cache.put(sha, pdf_file.name, texts)
+                if writer is None:
                     append_row_to_csv(row)
                     pdf_file.unlink()
-                    processed.add(pdf_file.name)
                     print(f"Processed & deleted `{pdf_file.name}`")
-                except Exception as e:
-                    print(f"Error processing `{pdf_file.name}`: {e}")
+                else:
+                    writer.add(row)
+                    buffered.append(pdf_file)
+                    skipped.add(pdf_file.name)    # don't offer it again
+                return
+            except Exception as e:
+                err = e
+        print(f"Error processing `{pdf_file.name}`: {err}")
+        retry.add(pdf_file)
 
-            time.sleep(poll_interval)
+    def crashed(pdf_file):
+        # retry a file that killed its worker, but give up on one that
+        # keeps doing so
+        print(f"Error processing `{pdf_file.name}`: worker process died")
+        retry.add(pdf_file)
+        crashes[pdf_file.name] = crashes.get(pdf_file.name, 0) + 1
+        if crashes[pdf_file.name] >= MAX_CRASHES:
+            print(f"Skipping `{pdf_file.name}` after {MAX_CRASHES} worker crashes")
+            del crashes[pdf_file.name]
+            retry.discard(pdf_file)
+            skipped.add(pdf_file.name)
+
+    print(f"Watching `{folder}` for new PDFs" +
+          (f" with {workers} workers" if pool else ""))
+    try:
+        # wake at least as often as timed flushes are due
+        wake = min(poll_interval, batch_wait) if writer is not None else poll_interval
+        for batch in watch_folder(folder, wake, retry, skipped):
+            for pdf_file in batch:
+                print(f"New file: {pdf_file.name}")
+
+            # rows are written here, in file-name order, by this process only
+            orphans = []
+            for pdf_file, row, err in run_batch(batch, pool, fn):
+                if isinstance(err, BrokenProcessPool):
+                    orphans.append(pdf_file)
+                else:
+                    handle(pdf_file, row, err)
+
+            if orphans:
+                # a worker died (e.g. a crash inside MuPDF) and took every
+                # unfinished file with it; re-run those one at a time so only
+                # the file that kills its worker is charged with a crash
+                pool.shutdown(cancel_futures=True)
+                solo = ProcessPoolExecutor(1)
+                try:
+                    for pdf_file in orphans:
+                        for _, row, err in run_batch([pdf_file], solo, fn):
+                            if isinstance(err, BrokenProcessPool):
+                                crashed(pdf_file)
+                                solo.shutdown(cancel_futures=True)
+                                solo = ProcessPoolExecutor(1)
+                            else:
+                                handle(pdf_file, row, err)
+                finally:
+                    solo.shutdown(cancel_futures=True)
+                pool = ProcessPoolExecutor(workers)
+            if writer is not None and writer.due():
+                commit()
     except KeyboardInterrupt:
         print("\nStopped watching.")
+    finally:
+        commit()
+        if cache is not None:
+            cache.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
 if __name__ == "__main__":
-    watch_and_process("pdfs", poll_interval=5)
\ No newline at end of file
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", nargs="?", default="pdfs",
+                    help="folder the crawler downloads into (default: %(default)s)")
+    ap.add_argument("--poll", type=float, default=5,
+                    help="seconds between folder scans (default: %(default)s)")
+    ap.add_argument("-w", "--workers", type=int, default=1,
+                    help="parse PDFs in N worker processes (default: %(default)s)")
+    ap.add_argument("-o", "--out", default=STORE_PATH,
+                    help="Parquet dataset folder (default: %(default)s)")
+    ap.add_argument("--batch-rows", type=int, default=500,
+                    help="flush after this many rows (default: %(default)s)")
+    ap.add_argument("--batch-wait", type=float, default=30.0,
+                    help="…or after this many seconds (default: %(default)s)")
+    ap.add_argument("--csv", action="store_true",
+                    help="append rows to all_course_stats.csv instead (legacy format)")
+    ap.add_argument("--cache", default=CACHE_PATH,
+                    help="page-text cache keyed by PDF hash (default: %(default)s)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="don't keep page text of extracted PDFs")
+    ap.add_argument("--cache-all-pages", action="store_true",
+                    help="cache every page, not only those the parser needed "
+                         "(reads past the early stop)")
+    ap.add_argument("--reextract", action="store_true",
+                    help="rebuild the output from the cache instead of watching")
+    args = ap.parse_args()
+
+    if args.reextract:
+        try:
+            reextract(args.cache, out=args.out, csv=args.csv)
+        except (FileNotFoundError, ValueError) as e:
+            sys.exit(f"--reextract: {e}")
+    else:
+        watch_and_process(args.folder, poll_interval=args.poll, workers=args.workers,
+                          out=args.out, csv=args.csv, batch_rows=args.batch_rows,
+                          batch_wait=args.batch_wait,
+                          cache_path=None if args.no_cache else args.cache,
+                          cache_all_pages=args.cache_all_pages)
@@ -1,38 +1,28 @@
 import pandas as pd
-import ast
 import matplotlib
 matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 
+import os
+import sys
 import pandas as pd
-import ast
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'course_dashboard'))
+from preprocess import hist_matrix, hist_stats
+
 df = pd.read_csv('all_course_stats.csv')
 hist_cols = df.columns[7:]
 
-def parse_hist_stats(cell):
-    if pd.isna(cell):
-        return 0, np.nan, np.nan
-    pairs = ast.literal_eval(cell)
-    counts = {v: c for v, c in pairs if v != 0}
-    n = sum(counts.values())
-    if n == 0:
-        return 0, np.nan, np.nan
-    mean = sum(v*c for v,c in counts.items()) / n
-    m2 = sum((v**2)*c for v,c in counts.items()) / n
-    var = m2 - mean**2
-    sd = np.sqrt(var) if var > 0 else 0.0
-    return n, mean, sd
-
 for q in hist_cols:
-    df[[f'{q}_n', f'{q}_mean', f'{q}_sd']] = df[q].apply(
-        lambda cell: pd.Series(parse_hist_stats(cell))
-    )
-    df[f'{q}_stderr']  = df[f'{q}_sd']   / np.sqrt(df[f'{q}_n'])
-    df[f'{q}_ci_lower'] = df[f'{q}_mean'] - 1.96 * df[f'{q}_stderr']
-    df[f'{q}_ci_upper'] = df[f'{q}_mean'] + 1.96 * df[f'{q}_stderr']
+    n, mean, sd = hist_stats(hist_matrix(df[q]))
+    df[f'{q}_n'], df[f'{q}_mean'], df[f'{q}_sd'] = n, mean, sd
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stderr = sd / np.sqrt(n)
+    df[f'{q}_stderr']   = stderr
+    df[f'{q}_ci_lower'] = mean - 1.96 * stderr
+    df[f'{q}_ci_upper'] = mean + 1.96 * stderr
 
 course_col = df.columns[0]
 instr_col  = next(c for c in df.columns if 'instructor' in c.lower())